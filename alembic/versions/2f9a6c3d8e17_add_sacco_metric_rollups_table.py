@@ -0,0 +1,64 @@
+"""add sacco metric rollups table
+
+Revision ID: 2f9a6c3d8e17
+Revises: 8e1d5f0b6a24
+Create Date: 2026-10-18 11:26:05.731902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f9a6c3d8e17'
+down_revision: Union[str, None] = '8e1d5f0b6a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sacco_metric_rollups',
+    sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('metric_count', sa.Integer(), nullable=False),
+    sa.Column('sum_membership_count', sa.Float(), nullable=False),
+    sa.Column('sum_loan_book_value', sa.Float(), nullable=False),
+    sa.Column('sum_asset_base', sa.Float(), nullable=False),
+    sa.Column('sum_deposits', sa.Float(), nullable=False),
+    sa.Column('sum_dividend_rate', sa.Float(), nullable=False),
+    sa.Column('sum_interest_rebate', sa.Float(), nullable=False),
+    sa.Column('sum_revenue', sa.Float(), nullable=False),
+    sa.Column('sum_portfolio_at_risk', sa.Float(), nullable=False),
+    sa.Column('avg_membership_count', sa.Float(), nullable=False),
+    sa.Column('avg_loan_book_value', sa.Float(), nullable=False),
+    sa.Column('avg_asset_base', sa.Float(), nullable=False),
+    sa.Column('avg_deposits', sa.Float(), nullable=False),
+    sa.Column('avg_dividend_rate', sa.Float(), nullable=False),
+    sa.Column('avg_interest_rebate', sa.Float(), nullable=False),
+    sa.Column('avg_revenue', sa.Float(), nullable=False),
+    sa.Column('avg_portfolio_at_risk', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('year')
+    )
+
+    # Seed the rollups from the metrics already stored; year 0 covers all years
+    fields = ['membership_count', 'loan_book_value', 'asset_base', 'deposits',
+              'dividend_rate', 'interest_rebate', 'revenue', 'portfolio_at_risk']
+    columns = ', '.join([f'sum_{f}' for f in fields] + [f'avg_{f}' for f in fields])
+    sums = ', '.join(f'SUM(COALESCE({f}, 0))' for f in fields)
+    avgs = ', '.join(f'SUM(COALESCE({f}, 0)) / COUNT(*)' for f in fields)
+    op.execute(
+        f'INSERT INTO sacco_metric_rollups (year, metric_count, {columns}) '
+        f'SELECT year, COUNT(*), {sums}, {avgs} FROM sacco_metrics GROUP BY year'
+    )
+    op.execute(
+        f'INSERT INTO sacco_metric_rollups (year, metric_count, {columns}) '
+        f'SELECT 0, COUNT(*), {sums}, {avgs} FROM sacco_metrics HAVING COUNT(*) > 0'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sacco_metric_rollups')
@@ -0,0 +1,43 @@
+"""add chat summaries and chat history index
+
+Revision ID: 4b7e2a9c1f53
+Revises: 1d8f38e9ab97
+Create Date: 2026-10-18 09:12:40.512233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2a9c1f53'
+down_revision: Union[str, None] = '1d8f38e9ab97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chat_summaries',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('document_id', sa.String(length=36), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('summarized_until', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('document_id', 'user_id', name='_summary_doc_user_uc')
+    )
+    op.create_index(op.f('ix_chat_summaries_id'), 'chat_summaries', ['id'], unique=True)
+    op.create_index('ix_chats_document_user_timestamp', 'chats', ['document_id', 'user_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chats_document_user_timestamp', table_name='chats')
+    op.drop_index(op.f('ix_chat_summaries_id'), table_name='chat_summaries')
+    op.drop_table('chat_summaries')
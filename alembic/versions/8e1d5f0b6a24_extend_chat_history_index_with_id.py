@@ -0,0 +1,30 @@
+"""extend chat history index with id
+
+Revision ID: 8e1d5f0b6a24
+Revises: 4b7e2a9c1f53
+Create Date: 2026-10-18 10:03:17.284651
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1d5f0b6a24'
+down_revision: Union[str, None] = '4b7e2a9c1f53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination orders by (timestamp, id), so the index carries id as a tiebreaker
+    op.create_index('ix_chats_document_user_timestamp_id', 'chats', ['document_id', 'user_id', 'timestamp', 'id'], unique=False)
+    op.drop_index('ix_chats_document_user_timestamp', table_name='chats')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_chats_document_user_timestamp', 'chats', ['document_id', 'user_id', 'timestamp'], unique=False)
+    op.drop_index('ix_chats_document_user_timestamp_id', table_name='chats')
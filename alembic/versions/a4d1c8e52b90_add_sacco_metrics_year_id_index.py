@@ -0,0 +1,27 @@
+"""add sacco metrics year id index
+
+Revision ID: a4d1c8e52b90
+Revises: 7c3b9e4f2a61
+Create Date: 2026-10-18 14:41:53.602817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d1c8e52b90'
+down_revision: Union[str, None] = '7c3b9e4f2a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_sacco_metrics_year_id', 'sacco_metrics', ['year', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sacco_metrics_year_id', table_name='sacco_metrics')
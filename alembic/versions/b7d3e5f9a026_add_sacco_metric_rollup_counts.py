@@ -0,0 +1,50 @@
+"""add sacco metric rollup counts
+
+Revision ID: b7d3e5f9a026
+Revises: f8a2c4e6b139
+Create Date: 2026-10-18 19:21:08.640215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e5f9a026'
+down_revision: Union[str, None] = 'f8a2c4e6b139'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIELDS = ['membership_count', 'loan_book_value', 'asset_base', 'deposits',
+          'dividend_rate', 'interest_rebate', 'revenue', 'portfolio_at_risk']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for field in FIELDS:
+        op.add_column('sacco_metric_rollups', sa.Column(f'count_{field}', sa.Integer(), server_default='0', nullable=False))
+
+    # Averages now skip NULL metrics, as AVG() did before the rollups existed
+    for field in FIELDS:
+        op.execute(
+            f'UPDATE sacco_metric_rollups SET count_{field} = '
+            f'(SELECT COUNT(m.{field}) FROM sacco_metrics m '
+            f'WHERE m.year = sacco_metric_rollups.year OR sacco_metric_rollups.year = 0)'
+        )
+        op.execute(
+            f'UPDATE sacco_metric_rollups SET avg_{field} = '
+            f'CASE WHEN count_{field} > 0 THEN sum_{field} / count_{field} ELSE 0 END'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for field in FIELDS:
+        op.execute(
+            f'UPDATE sacco_metric_rollups SET avg_{field} = '
+            f'CASE WHEN metric_count > 0 THEN sum_{field} / metric_count ELSE 0 END'
+        )
+    for field in reversed(FIELDS):
+        op.drop_column('sacco_metric_rollups', f'count_{field}')
@@ -0,0 +1,33 @@
+"""add documents listing indexes
+
+Revision ID: c5e7a9d2f814
+Revises: a4d1c8e52b90
+Create Date: 2026-10-18 16:05:12.417390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7a9d2f814'
+down_revision: Union[str, None] = 'a4d1c8e52b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_documents_created_at_id', 'documents', ['created_at', 'id'], unique=False)
+    op.create_index('ix_documents_year_created_at_id', 'documents', ['year', 'created_at', 'id'], unique=False)
+    op.create_index('ix_documents_status_created_at_id', 'documents', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_documents_uploaded_by_created_at_id', 'documents', ['uploaded_by', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_uploaded_by_created_at_id', table_name='documents')
+    op.drop_index('ix_documents_status_created_at_id', table_name='documents')
+    op.drop_index('ix_documents_year_created_at_id', table_name='documents')
+    op.drop_index('ix_documents_created_at_id', table_name='documents')
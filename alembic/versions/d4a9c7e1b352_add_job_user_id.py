@@ -0,0 +1,28 @@
+"""add job user id
+
+Revision ID: d4a9c7e1b352
+Revises: b7d3e5f9a026
+Create Date: 2026-10-18 21:12:44.905318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9c7e1b352'
+down_revision: Union[str, None] = 'b7d3e5f9a026'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('user_id', sa.String(length=36), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'user_id')
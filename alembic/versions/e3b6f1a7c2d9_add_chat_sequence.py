@@ -0,0 +1,34 @@
+"""add chat sequence
+
+Revision ID: e3b6f1a7c2d9
+Revises: c5e7a9d2f814
+Create Date: 2026-10-18 17:12:40.905318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b6f1a7c2d9'
+down_revision: Union[str, None] = 'c5e7a9d2f814'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('sequence', sa.BigInteger(), server_default='0', nullable=False))
+    # Existing exchanges at least keep each reply after its question
+    op.execute("UPDATE chats SET sequence = 1 WHERE sender = 'assistant'")
+    op.create_index('ix_chats_document_user_timestamp_sequence_id', 'chats', ['document_id', 'user_id', 'timestamp', 'sequence', 'id'], unique=False)
+    op.drop_index('ix_chats_document_user_timestamp_id', table_name='chats')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_chats_document_user_timestamp_id', 'chats', ['document_id', 'user_id', 'timestamp', 'id'], unique=False)
+    op.drop_index('ix_chats_document_user_timestamp_sequence_id', table_name='chats')
+    op.drop_column('chats', 'sequence')
@@ -0,0 +1,30 @@
+"""add chat summary keyset mark
+
+Revision ID: f8a2c4e6b139
+Revises: e3b6f1a7c2d9
+Create Date: 2026-10-18 17:48:26.533107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8a2c4e6b139'
+down_revision: Union[str, None] = 'e3b6f1a7c2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_summaries', sa.Column('summarized_until_sequence', sa.BigInteger(), nullable=True))
+    op.add_column('chat_summaries', sa.Column('summarized_until_id', sa.String(length=36), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_summaries', 'summarized_until_id')
+    op.drop_column('chat_summaries', 'summarized_until_sequence')
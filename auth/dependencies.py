@@ -1,14 +1,46 @@
+import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from pydantic import BaseModel
+from sqlalchemy import event
 from auth.jwt_handler import SECRET_KEY, ALGORITHM
 from database.models import User
-from database.database import get_db
-from sqlalchemy.orm import Session
+from database.database import SessionLocal
+from utils.cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+class CurrentUser(BaseModel):
+    id: str
+    username: str
+    userType: int
+
+# Resolved principals keyed by user id; never holds the password hash
+user_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_USER_CACHE_SIZE") or 10000),
+    ttl=float(os.getenv("AUTH_USER_CACHE_TTL") or 300),
+)
+
+def invalidate_user(user_id: str):
+    user_cache.pop(user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _drop_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+def load_user(user_id: str):
+    db = SessionLocal()
+    try:
+        row = db.query(User.id, User.username, User.userType).filter(User.id == user_id).first()
+    finally:
+        db.close()
+    if row is None:
+        return None
+    return CurrentUser(id=row.id, username=row.username, userType=row.userType)
+
+def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or missing token",
@@ -22,7 +54,10 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        user = load_user(user_id)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user_id, user)
     return user
@@ -1,19 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from database.database import get_db
-from database.models import Document, Chat
-from openai import OpenAI
-from chromadb import PersistentClient
+from typing import Optional
+from datetime import datetime
+from database.database import get_db, SessionLocal
+from database.models import Document, Chat, SaccoMetric
+from openai import AsyncOpenAI
 from uuid import uuid4
+from utils.embeddings import aembed_query
+from utils.vector_store import get_vector_store
+from utils.chat_history import build_history, delete_summary
+from utils.pagination import encode_cursor, decode_cursor
+from utils.sse import sse_event
+from utils.metric_intents import classify_metric_question, format_metric_answer, fast_path_stats
+from utils.answer_cache import answer_cache, ANSWER_CACHE_ENABLED
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
 
 load_dotenv()
 router = APIRouter()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-chroma_client = PersistentClient(path=".chroma")
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 class ChatRequest(BaseModel):
     query: str
@@ -22,120 +34,247 @@ class ChatRequest(BaseModel):
 
 
 @router.get("/chat/{document_id}/{user_id}")
-def get_chat_history(document_id: str, user_id: str, db: Session = Depends(get_db)):
-    history = db.query(Chat).filter(
+def get_chat_history(
+    document_id: str,
+    user_id: str,
+    before: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Chat.id, Chat.sender, Chat.message, Chat.timestamp, Chat.sequence).filter(
         Chat.document_id == document_id,
         Chat.user_id == user_id
-    ).order_by(Chat.timestamp).all()
+    )
+    if before:
+        timestamp, sequence, chat_id = decode_cursor(before, (datetime, int, str))
+        query = query.filter(or_(
+            Chat.timestamp < timestamp,
+            and_(Chat.timestamp == timestamp, Chat.sequence < sequence),
+            and_(Chat.timestamp == timestamp, Chat.sequence == sequence, Chat.id < chat_id)
+        ))
 
-    return [
-        {"sender": chat.sender, "text": chat.message}
-        for chat in history
-    ]
+    # Newest page first; one extra row tells us whether an older page exists
+    rows = query.order_by(Chat.timestamp.desc(), Chat.sequence.desc(), Chat.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
+    return {
+        "messages": [{"sender": row.sender, "text": row.message} for row in reversed(rows)],
+        "nextCursor": encode_cursor(rows[-1].timestamp, rows[-1].sequence, rows[-1].id) if has_more else None,
+    }
 
-@router.post("/chat/{document_id}")
-def chat_with_document(document_id: str, body: ChatRequest, db: Session = Depends(get_db)):
-    doc = db.query(Document).filter(Document.id == document_id).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
 
-    normalized = body.query.strip().lower()
+# Handle common greetings or casual expressions
+CASUAL_REPLIES = {
+    "hi": "Hello! Ask me something about the financial report.",
+    "hello": "Hey there! What would you like to know about this report?",
+    "hey": "Hi! I’m ready when you are.",
+    "thanks": "You're welcome! Let me know if you need help with anything in the document.",
+    "thank you": "Always happy to help!",
+    "bye": "Goodbye! Come back anytime to explore the financials.",
+}
 
-    # Handle common greetings or casual expressions
-    casual_replies = {
-        "hi": "Hello! Ask me something about the financial report.",
-        "hello": "Hey there! What would you like to know about this report?",
-        "hey": "Hi! I’m ready when you are.",
-        "thanks": "You're welcome! Let me know if you need help with anything in the document.",
-        "thank you": "Always happy to help!",
-        "bye": "Goodbye! Come back anytime to explore the financials.",
-    }
 
-    for key, reply in casual_replies.items():
+def get_casual_reply(query: str):
+    normalized = query.strip().lower()
+    for key, reply in CASUAL_REPLIES.items():
         if normalized.startswith(key):
-            db.add(Chat(
-                id=str(uuid4()),
-                user_id=body.userId,
-                document_id=document_id,
-                sender='user',
-                message=body.query
-            ))
-
-            db.add(Chat(
-                id=str(uuid4()),
-                user_id=body.userId,
-                document_id=document_id,
-                sender='assistant',
-                message=reply
-            ))
-
-            db.commit()
-            return {"response": reply}
-    embedded_query = client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=body.query
-    ).data[0].embedding
-
-    collection = chroma_client.get_or_create_collection(name="sacco_docs")
-    results = collection.query(
-        query_embeddings=[embedded_query],
-        n_results=5,
-        where={"document_id": document_id}
-    )
-    chunks = results['documents'][0] if results['documents'] else []
-    context = "\n\n".join(chunks) or "No relevant content found in the document."
+            return reply
+    return None
 
-    past_chats = db.query(Chat).filter(
-        Chat.document_id == document_id,
-        Chat.user_id == body.userId
-    ).order_by(Chat.timestamp).all()
 
-    messages = [
-        {"role": "system", "content": "You are a helpful financial assistant. Use only the document context provided."}
-    ] + [
-        {"role": chat.sender, "content": chat.message} for chat in past_chats
-    ]
+def load_metric_answer(db: Session, document_id: str, field: str):
+    row = db.query(getattr(SaccoMetric, field), SaccoMetric.year, Document.name).join(
+        Document, Document.id == SaccoMetric.document_id
+    ).filter(SaccoMetric.document_id == document_id).first()
+    return format_metric_answer(field, row[0], row.name, row.year) if row else None
 
-    messages.append({
-        "role": "user",
-        "content": f"Document context:\n{context}\n\n{body.query}"
-    })
 
-    completion = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=messages
-    )
+async def get_metric_reply(document_id: str, query: str):
+    # Single-metric lookups are answered from the extracted figures, skipping the
+    # embedding, vector search and completion; anything else falls through to RAG
+    field = classify_metric_question(query)
+    reply = await run_in_threadpool(with_session, load_metric_answer, document_id, field) if field else None
+    fast_path_stats.record(field, reply is not None)
+    return reply
 
-    response_text = completion.choices[0].message.content
 
+def save_exchange(db: Session, document_id: str, user_id: str, query: str, reply: str):
+    # Both rows get the same server timestamp, so the sequence puts the reply after its question
+    sequence = time.time_ns() // 1000
     db.add(Chat(
         id=str(uuid4()),
-        user_id=body.userId,
+        user_id=user_id,
         document_id=document_id,
         sender='user',
-        message=body.query
+        message=query,
+        sequence=sequence
     ))
 
     db.add(Chat(
         id=str(uuid4()),
-        user_id=body.userId,
+        user_id=user_id,
         document_id=document_id,
         sender='assistant',
-        message=response_text
+        message=reply,
+        sequence=sequence + 1
     ))
 
     db.commit()
 
+
+def with_session(fn, *args):
+    # Runs fn with a short-lived session; used from the threadpool so the
+    # event loop never waits on the database
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def load_document(db: Session, document_id: str):
+    return db.query(Document.year, Document.updated_at).filter(Document.id == document_id).first()
+
+
+def has_history(db: Session, document_id: str, user_id: str) -> bool:
+    return db.query(Chat.id).filter(
+        Chat.document_id == document_id,
+        Chat.user_id == user_id
+    ).first() is not None
+
+
+def query_chunks(document_id: str, embedded_query, year: Optional[int] = None):
+    return get_vector_store().query(document_id, embedded_query, top_k=5, year=year)
+
+
+async def ensure_document(document_id: str):
+    # Returns the document's year, which locates its vectors when they are partitioned
+    # by year, and updated_at, which versions its cached answers
+    doc = await run_in_threadpool(with_session, load_document, document_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return doc
+
+
+async def get_cached_answer(document_id: str, doc, body: ChatRequest):
+    # Returns (cached answer, query embedding, whether the answer may be cached).
+    # Answers are only shared between users when there is no history to shape them.
+    if not ANSWER_CACHE_ENABLED:
+        return None, None, False
+    if await run_in_threadpool(with_session, has_history, document_id, body.userId):
+        answer_cache.skip()
+        return None, None, False
+    embedded_query = await aembed_query(body.query)
+    return answer_cache.get(document_id, doc.updated_at, embedded_query), embedded_query, True
+
+
+async def store_exchange(document_id: str, user_id: str, query: str, reply: str):
+    await run_in_threadpool(with_session, save_exchange, document_id, user_id, query, reply)
+
+
+async def build_messages(document_id: str, body: ChatRequest, year: Optional[int] = None, embedded_query=None):
+    if embedded_query is None:
+        embedded_query = await aembed_query(body.query)
+
+    chunks, history = await asyncio.gather(
+        run_in_threadpool(query_chunks, document_id, embedded_query, year),
+        build_history(document_id, body.userId),
+    )
+    context = "\n\n".join(chunks) or "No relevant content found in the document."
+
+    messages = [
+        {"role": "system", "content": "You are a helpful financial assistant. Use only the document context provided."}
+    ] + history
+
+    messages.append({
+        "role": "user",
+        "content": f"Document context:\n{context}\n\n{body.query}"
+    })
+    return messages
+
+
+@router.post("/chat/{document_id}")
+async def chat_with_document(document_id: str, body: ChatRequest):
+    doc = await ensure_document(document_id)
+
+    reply = get_casual_reply(body.query) or await get_metric_reply(document_id, body.query)
+    if reply:
+        await store_exchange(document_id, body.userId, body.query, reply)
+        return {"response": reply}
+
+    reply, embedded_query, cacheable = await get_cached_answer(document_id, doc, body)
+    if reply:
+        await store_exchange(document_id, body.userId, body.query, reply)
+        return {"response": reply}
+
+    messages = await build_messages(document_id, body, doc.year, embedded_query)
+
+    completion = await client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=messages
+    )
+
+    response_text = completion.choices[0].message.content
+
+    await store_exchange(document_id, body.userId, body.query, response_text)
+    if cacheable:
+        answer_cache.put(document_id, doc.updated_at, embedded_query, body.query, response_text)
+
     return {"response": response_text}
 
 
+@router.post("/chat/{document_id}/stream")
+async def stream_chat_with_document(document_id: str, body: ChatRequest):
+    doc = await ensure_document(document_id)
+
+    reply = get_casual_reply(body.query) or await get_metric_reply(document_id, body.query)
+    embedded_query, cacheable = None, False
+    if not reply:
+        reply, embedded_query, cacheable = await get_cached_answer(document_id, doc, body)
+    messages = None if reply else await build_messages(document_id, body, doc.year, embedded_query)
+
+    async def event_stream():
+        if reply:
+            yield sse_event({"token": reply})
+            full_text = reply
+        else:
+            parts = []
+            try:
+                stream = await client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    stream=True
+                )
+                async for chunk in stream:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        parts.append(token)
+                        yield sse_event({"token": token})
+            except Exception as e:
+                yield sse_event({"detail": str(e)}, event="error")
+                return
+            full_text = "".join(parts)
+            if cacheable:
+                answer_cache.put(document_id, doc.updated_at, embedded_query, body.query, full_text)
+
+        await store_exchange(document_id, body.userId, body.query, full_text)
+        yield sse_event({"response": full_text}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/chat/{document_id}/{user_id}")
 def delete_chat_history(document_id: str, user_id: str, db: Session = Depends(get_db)):
     deleted = db.query(Chat).filter(
         Chat.document_id == document_id,
         Chat.user_id == user_id
     ).delete()
+    delete_summary(db, document_id, user_id)
     db.commit()
     return {"message": f"Deleted {deleted} messages."}
 
@@ -1,50 +1,70 @@
+import os
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from database.database import get_db
-from database.models import SaccoMetric, Document , User
-from sqlalchemy import func
+from database.models import SaccoMetric, SaccoMetricRollup, Document , User
+from types import SimpleNamespace
+from utils.metric_rollups import ALL_YEARS, METRIC_FIELDS
 from auth.dependencies import get_current_user
+from utils.response_cache import ResponseCache, create_backend
 
 router = APIRouter()
 
+# Dashboard data only changes when documents or metrics are written; the TTL
+# bounds staleness for writes made by other processes
+dashboard_cache = ResponseCache(
+    "dashboard",
+    create_backend(
+        os.getenv("DASHBOARD_CACHE_BACKEND") or "memory",
+        maxsize=int(os.getenv("DASHBOARD_CACHE_SIZE") or 1024),
+        ttl=float(os.getenv("DASHBOARD_CACHE_TTL") or 60),
+    ),
+    watched_models=(Document, SaccoMetric, SaccoMetricRollup),
+)
+
 @router.get("/years")
 def get_available_years(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    years = db.query(SaccoMetric.year).distinct().order_by(SaccoMetric.year.desc()).all()
-    return [year[0] for year in years]
+    key = dashboard_cache.key("years")
+    cached = dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+
+    years = db.query(SaccoMetricRollup.year).filter(
+        SaccoMetricRollup.year != ALL_YEARS
+    ).order_by(SaccoMetricRollup.year.desc()).all()
+    response = [year[0] for year in years]
+    dashboard_cache.set(key, response)
+    return response
 
 @router.get("/documents")
 def get_documents_for_year(year: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    key = dashboard_cache.key("documents", year=year)
+    cached = dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+
     docs = db.query(Document.id, Document.name).filter(Document.year == year).order_by(Document.created_at.desc()).all()
-    return [{"id": d.id, "name": d.name} for d in docs]
+    response = [{"id": d.id, "name": d.name} for d in docs]
+    dashboard_cache.set(key, response)
+    return response
 
 @router.get("/metrics")
 def get_average_metrics(year: int = Query(None), document_id: str = Query(None), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    key = dashboard_cache.key("metrics", year=year, document_id=document_id)
+    cached = dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+
     if document_id:
         metric = db.query(SaccoMetric).filter(SaccoMetric.document_id == document_id).first()
-    elif year:
-        metric = db.query(
-            func.avg(SaccoMetric.membership_count).label("membership_count"),
-            func.avg(SaccoMetric.loan_book_value).label("loan_book_value"),
-            func.avg(SaccoMetric.asset_base).label("asset_base"),
-            func.avg(SaccoMetric.deposits).label("deposits"),
-            func.avg(SaccoMetric.dividend_rate).label("dividend_rate"),
-            func.avg(SaccoMetric.interest_rebate).label("interest_rebate"),
-            func.avg(SaccoMetric.revenue).label("revenue"),
-            func.avg(SaccoMetric.portfolio_at_risk).label("portfolio_at_risk")
-        ).filter(SaccoMetric.year == year).first()
     else:
-        metric = db.query(
-            func.avg(SaccoMetric.membership_count).label("membership_count"),
-            func.avg(SaccoMetric.loan_book_value).label("loan_book_value"),
-            func.avg(SaccoMetric.asset_base).label("asset_base"),
-            func.avg(SaccoMetric.deposits).label("deposits"),
-            func.avg(SaccoMetric.dividend_rate).label("dividend_rate"),
-            func.avg(SaccoMetric.interest_rebate).label("interest_rebate"),
-            func.avg(SaccoMetric.revenue).label("revenue"),
-            func.avg(SaccoMetric.portfolio_at_risk).label("portfolio_at_risk")
-        ).first()
-
-    return {
+        # Per-year (or all-years) averages are maintained in sacco_metric_rollups
+        rollup = db.query(SaccoMetricRollup).filter(SaccoMetricRollup.year == (year or ALL_YEARS)).first()
+        metric = SimpleNamespace(**{
+            field: getattr(rollup, f"avg_{field}") if rollup else 0 for field in METRIC_FIELDS
+        })
+
+    response = {
         "membershipCount": int(metric.membership_count or 0),
         "loanBookValue": float(metric.loan_book_value or 0),
         "assetBase": float(metric.asset_base or 0),
@@ -54,3 +74,5 @@ def get_average_metrics(year: int = Query(None), document_id: str = Query(None),
         "revenue": float(metric.revenue or 0),
         "portfolioAtRisk": float(metric.portfolio_at_risk or 0),
     }
+    dashboard_cache.set(key, response)
+    return response
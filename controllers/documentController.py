@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import Annotated, List
-from schemas.documentSchema import DocumentCreate, DocumentResponse
+from typing import Annotated, Optional
+from datetime import datetime
+from schemas.documentSchema import DocumentCreate, DocumentResponse, DocumentPage
 from database.models import Document, User
 from database.database import SessionLocal
 from auth.dependencies import get_current_user
+from utils.file_cache import FileCache
+from utils.file_responses import file_response, upstream_response
+from utils import job_queue
+from utils.document_status import load_statuses, status_feed, FINAL_STATES
+from utils.sse import sse_event
+from utils.pagination import encode_cursor, decode_cursor
+import asyncio
 import os
-import requests
+import httpx
 import base64
 
 router = APIRouter()
@@ -14,6 +24,11 @@ router = APIRouter()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET")
 
+file_cache = FileCache(
+    directory=os.getenv("DOCUMENT_CACHE_DIR") or ".cache/documents",
+    max_bytes=int(os.getenv("DOCUMENT_CACHE_MAX_MB") or 1024) * 1024 * 1024,
+)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -31,29 +46,122 @@ async def upload_document(
 ):
     new_doc = Document(**doc.dict(), uploaded_by=current_user.id)
     db.add(new_doc)
+    db.flush()
+    # Committed together, so a worker can pick the document up immediately
+    job_queue.enqueue(db, job_queue.EMBED_DOCUMENT, new_doc.id)
     db.commit()
     db.refresh(new_doc)
     return new_doc
 
-@router.get("/", response_model=List[DocumentResponse])
-async def list_documents(
+@router.get("/", response_model=DocumentPage)
+def list_documents(
     db: db_dependency,
+    year: Optional[int] = None,
+    status: Optional[int] = None,
+    uploaded_by: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
     current_user: User = Depends(get_current_user)
 ):
-    return db.query(Document).order_by(Document.created_at.desc()).all()
+    query = db.query(
+        Document.id, Document.name, Document.year, Document.description,
+        Document.file_url, Document.status, Document.created_at
+    )
+    if year is not None:
+        query = query.filter(Document.year == year)
+    if status is not None:
+        query = query.filter(Document.status == status)
+    if uploaded_by:
+        query = query.filter(Document.uploaded_by == uploaded_by)
+    if cursor:
+        created_at, document_id = decode_cursor(cursor, (datetime, str))
+        query = query.filter(or_(
+            Document.created_at < created_at,
+            and_(Document.created_at == created_at, Document.id < document_id)
+        ))
 
-@router.get("/base64/{document_id}")
-async def get_document_base64(document_id: str, db: Session = Depends(get_db)):
-    doc = db.query(Document).filter(Document.id == document_id).first()
+    # Newest first; one extra row tells us whether another page exists
+    rows = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": [row._asdict() for row in rows],
+        "nextCursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+    }
+
+@router.get("/status/stream")
+async def stream_document_status(
+    ids: str = Query(..., description="Comma-separated document ids"),
+    current_user: User = Depends(get_current_user)
+):
+    document_ids = [i for i in ids.split(",") if i][:100]
+    if not document_ids:
+        raise HTTPException(status_code=400, detail="No document ids given")
+
+    async def event_stream():
+        inbox = await status_feed.subscribe(document_ids)
+        states = {}
+        try:
+            while True:
+                try:
+                    entry = await asyncio.wait_for(inbox.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                states[entry["id"]] = entry["state"]
+                yield sse_event(entry, event="status")
+                if len(states) == len(set(document_ids)) and set(states.values()) <= FINAL_STATES:
+                    yield sse_event({}, event="done")
+                    return
+        finally:
+            status_feed.unsubscribe(inbox)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{document_id}/status")
+def get_document_status(
+    document_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    entry = load_statuses(db, [document_id])[document_id]
+    if entry["state"] == "not_found":
+        raise HTTPException(status_code=404, detail="Document not found")
+    return entry
+
+@router.get("/{document_id}/file")
+def download_document(document_id: str, request: Request, db: Session = Depends(get_db)):
+    doc = db.query(Document.name, Document.file_url).filter(Document.id == document_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
     try:
-        res = requests.get(doc.file_url)
-        if res.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to fetch file from Supabase")
+        source, meta = file_cache.open(doc.file_url)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to fetch file from Supabase: {e}")
 
-        base64_pdf = base64.b64encode(res.content).decode('utf-8')
+    if meta is None:
+        return upstream_response(source, media_type="application/pdf", filename=f"{doc.name}.pdf")
+    return file_response(request, source, meta, media_type="application/pdf", filename=f"{doc.name}.pdf")
+
+# Superseded by /{document_id}/file, which streams and supports Range requests
+@router.get("/base64/{document_id}", deprecated=True)
+def get_document_base64(document_id: str, db: Session = Depends(get_db)):
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    try:
+        source, _ = file_cache.open(doc.file_url)
+        try:
+            base64_pdf = base64.b64encode(source.read()).decode('utf-8')
+        finally:
+            source.close()
         data_uri = f"data:application/pdf;base64,{base64_pdf}"
 
         return {
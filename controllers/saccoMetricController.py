@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, HTTPException, Query
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import Annotated, List
+from typing import Annotated, Optional
+from uuid import uuid4
 from database.database import SessionLocal
-from database.models import SaccoMetric
-from schemas.saccoMetricSchema import SaccoMetricCreate, SaccoMetricResponse
+from database.models import SaccoMetric, Document
+from utils.metric_rollups import apply_metric, rebuild_rollups, METRIC_FIELDS
+from utils.pagination import encode_cursor, decode_cursor
+from utils.upsert import upsert
+from schemas.saccoMetricSchema import SaccoMetricCreate, SaccoMetricResponse, SaccoMetricBulkUpsert, SaccoMetricPage
 
 router = APIRouter()
 
+MAX_BULK_ITEMS = 5000
+
 def get_db():
     db = SessionLocal()
     try:
@@ -20,10 +27,65 @@ db_dependency = Annotated[Session, Depends(get_db)]
 async def create_metric(metric: SaccoMetricCreate, db: db_dependency):
     new_metric = SaccoMetric(**metric.dict())
     db.add(new_metric)
+    apply_metric(db, new_metric)
     db.commit()
     db.refresh(new_metric)
     return new_metric
 
-@router.get("/", response_model=List[SaccoMetricResponse])
-async def list_metrics(db: db_dependency):
-    return db.query(SaccoMetric).order_by(SaccoMetric.year.desc()).all()
+@router.post("/bulk")
+def upsert_metrics(body: SaccoMetricBulkUpsert, db: db_dependency):
+    if len(body.items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} metrics per request")
+
+    # Later items win over earlier ones for the same (document_id, year)
+    rows = {}
+    for item in body.items:
+        rows[(item.document_id, item.year)] = {"id": str(uuid4()), **item.dict()}
+
+    document_ids = {document_id for document_id, _ in rows}
+    known = {row.id for row in db.query(Document.id).filter(Document.id.in_(document_ids))}
+    unknown = sorted(document_ids - known)
+    if unknown:
+        raise HTTPException(status_code=422, detail={"message": "Unknown documents", "documentIds": unknown})
+
+    upsert(db, SaccoMetric, list(rows.values()),
+           conflict_columns=["document_id", "year"], update_columns=METRIC_FIELDS)
+    # Updated rows change sums in place, so the affected years are recomputed
+    years = sorted({year for _, year in rows})
+    rebuild_rollups(db, years)
+    db.commit()
+
+    return {"received": len(body.items), "upserted": len(rows), "years": years}
+
+@router.get("/", response_model=SaccoMetricPage)
+def list_metrics(
+    db: db_dependency,
+    year: Optional[int] = None,
+    document_id: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    columns = [SaccoMetric.id, SaccoMetric.document_id, SaccoMetric.year, SaccoMetric.created_at] + [
+        getattr(SaccoMetric, field) for field in METRIC_FIELDS
+    ]
+    query = db.query(*columns)
+    if year is not None:
+        query = query.filter(SaccoMetric.year == year)
+    if document_id:
+        query = query.filter(SaccoMetric.document_id == document_id)
+    if cursor:
+        last_year, last_id = decode_cursor(cursor, (int, str))
+        query = query.filter(or_(
+            SaccoMetric.year < last_year,
+            and_(SaccoMetric.year == last_year, SaccoMetric.id < last_id)
+        ))
+
+    # Newest year first; one extra row tells us whether another page exists
+    rows = query.order_by(SaccoMetric.year.desc(), SaccoMetric.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": [row._asdict() for row in rows],
+        "nextCursor": encode_cursor(rows[-1].year, rows[-1].id) if has_more else None,
+    }
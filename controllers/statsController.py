@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from database.database import get_db
+from database.models import User
+from auth.dependencies import get_current_user, user_cache
+from utils.embeddings import embedding_cache, query_embedding_cache
+from controllers.dashboardController import dashboard_cache
+from controllers.documentController import file_cache
+from utils.http_client import pool_stats
+from utils import job_queue
+from utils.vector_store import get_vector_store
+from utils.metric_intents import fast_path_stats
+from utils.answer_cache import answer_cache
+
+router = APIRouter()
+
+@router.get("/")
+def get_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return {
+        "embeddingCache": embedding_cache.stats(),
+        "queryEmbeddingCache": query_embedding_cache.stats(),
+        "dashboardCache": dashboard_cache.stats(),
+        "authUserCache": user_cache.stats(),
+        "documentFileCache": file_cache.stats(),
+        "jobs": job_queue.stats(db),
+        "vectorStore": get_vector_store().stats(),
+        "chatFastPath": fast_path_stats.stats(),
+        "answerCache": answer_cache.stats(),
+        **pool_stats(),
+    }
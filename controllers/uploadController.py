@@ -1,6 +1,9 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-import os, requests, logging
+from starlette.concurrency import run_in_threadpool
+import os, base64, logging
+import httpx
 from dotenv import load_dotenv
+from utils.http_client import arequest
 
 load_dotenv()
 
@@ -8,52 +11,136 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET")
 
+# Uploads are streamed from the spooled request body in chunks of this size
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE") or 1024 * 1024)
+# Files at or above this size go through Supabase's resumable (TUS) endpoint
+RESUMABLE_UPLOAD_THRESHOLD = int(os.getenv("RESUMABLE_UPLOAD_THRESHOLD_MB") or 50) * 1024 * 1024
+# Supabase requires 6 MB chunks for resumable uploads
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+RESUMABLE_MAX_RETRIES = int(os.getenv("RESUMABLE_MAX_RETRIES") or 5)
+
 router = APIRouter()
 
 # Setup basic logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+async def iter_file(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    await file.seek(0)
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def get_file_size(file: UploadFile) -> int:
+    if file.size is not None:
+        return file.size
+
+    def measure():
+        file.file.seek(0, os.SEEK_END)
+        return file.file.tell()
+    return await run_in_threadpool(measure)
+
+
+def raise_for_supabase(response: httpx.Response, ok_statuses=(200, 201)):
+    if response.status_code in ok_statuses:
+        return
+    # Try to extract message from Supabase response
+    try:
+        error_detail = response.json().get("message", "Supabase upload failed")
+    except Exception:
+        error_detail = "Supabase upload failed"
+    raise HTTPException(status_code=response.status_code, detail=error_detail)
+
+
+async def simple_upload(file: UploadFile, file_path: str, size: int):
+    upload_url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{file_path}"
+    logger.info(f"Uploading to: {upload_url}")
+
+    headers = {
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "Content-Type": "application/octet-stream",
+        "Content-Length": str(size),
+    }
+    # A streamed body cannot be replayed, so only connection failures are retried
+    response = await arequest("POST", upload_url, headers=headers, content=iter_file(file))
+
+    logger.info(f"Supabase response code: {response.status_code}")
+    raise_for_supabase(response)
+
+
+async def resumable_upload(file: UploadFile, file_path: str, size: int):
+    endpoint = f"{SUPABASE_URL}/storage/v1/upload/resumable"
+    logger.info(f"Resumable upload to: {endpoint}")
+
+    headers = {"Authorization": f"Bearer {SUPABASE_KEY}", "Tus-Resumable": "1.0.0"}
+    metadata = {
+        "bucketName": SUPABASE_BUCKET,
+        "objectName": file_path,
+        "contentType": file.content_type or "application/octet-stream",
+    }
+    encoded_metadata = ",".join(
+        f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in metadata.items()
+    )
+
+    created = await arequest("POST", endpoint, headers={
+        **headers,
+        "Upload-Length": str(size),
+        "Upload-Metadata": encoded_metadata,
+    })
+    raise_for_supabase(created, ok_statuses=(201,))
+    location = created.headers["Location"]
+
+    offset, failures = 0, 0
+    while offset < size:
+        await file.seek(offset)
+        chunk = await file.read(RESUMABLE_CHUNK_SIZE)
+        try:
+            response = await arequest("PATCH", location, retries=0, content=chunk, headers={
+                **headers,
+                "Upload-Offset": str(offset),
+                "Content-Type": "application/offset+octet-stream",
+            })
+            raise_for_supabase(response, ok_statuses=(204,))
+            offset = int(response.headers["Upload-Offset"])
+            failures = 0
+        except (httpx.TransportError, HTTPException) as e:
+            failures += 1
+            if failures > RESUMABLE_MAX_RETRIES:
+                raise
+            # Ask the server how much it has and resume from there
+            logger.warning(f"Chunk at offset {offset} failed ({e}), resuming")
+            head = await arequest("HEAD", location, headers=headers)
+            raise_for_supabase(head, ok_statuses=(200, 204))
+            offset = int(head.headers["Upload-Offset"])
+
+
 @router.post("/")
 async def upload_to_supabase(file: UploadFile = File(...)):
     try:
-        contents = await file.read()
-
         if not SUPABASE_URL or not SUPABASE_KEY or not SUPABASE_BUCKET:
             logger.error("Supabase env variables are not set correctly.")
             raise HTTPException(status_code=500, detail="Server misconfiguration")
 
-        headers = {
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-            "Content-Type": "application/octet-stream"
-        }
-
         file_path = file.filename
-        upload_url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{file_path}"
+        size = await get_file_size(file)
 
-        logger.info(f"Uploading to: {upload_url}")
         logger.info(f"File name: {file_path}")
-        logger.info(f"File size: {len(contents)} bytes")
+        logger.info(f"File size: {size} bytes")
 
-        response = requests.post(upload_url, headers=headers, data=contents)
-
-        logger.info(f"Supabase response code: {response.status_code}")
-        logger.info(f"Supabase response body: {response.text}")
-
-        if response.status_code not in [200, 201]:
-            # Try to extract message from Supabase response
-            try:
-                error_detail = response.json().get("message", "Supabase upload failed")
-            except Exception:
-                error_detail = "Supabase upload failed"
-
-            raise HTTPException(status_code=response.status_code, detail=error_detail)
+        if size >= RESUMABLE_UPLOAD_THRESHOLD:
+            await resumable_upload(file, file_path, size)
+        else:
+            await simple_upload(file, file_path, size)
 
         public_url = f"{SUPABASE_URL}/storage/v1/object/public/{SUPABASE_BUCKET}/{file_path}"
         logger.info(f"Upload successful: {public_url}")
 
         return {"url": public_url, "name": file.filename}
 
+    except HTTPException:
+        logger.exception("Upload to Supabase failed")
+        raise
     except Exception as e:
         logger.exception("Upload to Supabase failed")
         raise HTTPException(status_code=500, detail=str(e))
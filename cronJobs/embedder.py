@@ -3,98 +3,191 @@
 import os
 import uuid
 import time
-import requests
-import schedule
+import queue
+import threading
 from io import BytesIO
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from database.database import SessionLocal
 from database.models import Document
-import pdfplumber
-from chromadb import PersistentClient
-from openai import OpenAI
-from tiktoken import get_encoding
+from utils.embeddings import embed_texts, embedding_cache
+from utils.vector_store import get_vector_store
+from utils import http_client
+from utils.pdf_utils import extract_pages
+from utils.chunking import iter_chunks
 
 # Load .env and initialize clients
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-chroma_client = PersistentClient(path=".chroma")
+
+# Pipeline sizing: downloads are network bound; extraction fans pages out to
+# the shared PDF process pool, so EXTRACT_WORKERS is documents in flight
+DOWNLOAD_WORKERS = int(os.getenv("EMBED_DOWNLOAD_WORKERS", 4))
+EXTRACT_WORKERS = int(os.getenv("EMBED_EXTRACT_WORKERS") or 2)
+EMBED_WORKERS = int(os.getenv("EMBED_EMBED_WORKERS", 4))
+QUEUE_SIZE = int(os.getenv("EMBED_QUEUE_SIZE", 8))
+
+_DONE = object()
 
 def download_pdf(url):
-    response = requests.get(url)
+    response = http_client.request("GET", url)
     response.raise_for_status()
     return BytesIO(response.content)
 
 def extract_text_from_pdf(file_stream):
-    with pdfplumber.open(file_stream) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return "\n".join(text for _, text in extract_pages(file_stream.getvalue()))
 
 def chunk_text(text, chunk_size=300, overlap=50):
-    enc = get_encoding("cl100k_base")
-    tokens = enc.encode(text)
-    chunks = []
+    return [chunk["text"] for chunk in iter_chunks([(1, text)], chunk_size, overlap)]
 
-    for i in range(0, len(tokens), chunk_size - overlap):
-        chunk = tokens[i:i + chunk_size]
-        chunks.append(enc.decode(chunk))
+def extract_chunks(pdf_bytes):
+    # Pages stream from the page cache straight into the chunker
+    return list(iter_chunks(extract_pages(pdf_bytes)))
+
+def embed_chunks(chunks):
+    return embed_texts(
+        [chunk["text"] for chunk in chunks],
+        token_counts=[chunk["token_count"] for chunk in chunks]
+    )
 
-    return chunks
+def store_chunks(document_id, chunks, embeddings, year=None):
+    metadatas = [{
+        "page_start": chunk["page_start"],
+        "page_end": chunk["page_end"],
+        "token_count": chunk["token_count"],
+    } for chunk in chunks]
+
+    get_vector_store().add(
+        document_id,
+        [chunk["text"] for chunk in chunks],
+        embeddings,
+        metadatas,
+        year=year
+    )
 
-def ingest_to_chroma(document_id, file_url):
+def ingest_to_chroma(document_id, file_url, year=None):
     print(f"Ingesting: {file_url}")
     pdf_stream = download_pdf(file_url)
-    text = extract_text_from_pdf(pdf_stream)
-    chunks = chunk_text(text)
+    chunks = extract_chunks(pdf_stream.getvalue())
 
     if not chunks:
         print(f"No text extracted for {document_id}")
         return
 
-    collection = chroma_client.get_or_create_collection(name="sacco_docs")
-
     print(f" Generating embeddings for {len(chunks)} chunks...")
-    embeddings_response = client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=chunks
-    )
-    embeddings = [e.embedding for e in embeddings_response.data]
+    embeddings = embed_chunks(chunks)
+    store_chunks(document_id, chunks, embeddings, year)
 
-    ids = [f"{document_id}_{i}" for i in range(len(chunks))]
-    metadatas = [{"document_id": document_id} for _ in range(len(chunks))]
+    print(f" Embedded {len(chunks)} chunks for document {document_id}")
 
-    collection.add(
-        documents=chunks,
-        embeddings=embeddings,
-        ids=ids,
-        metadatas=metadatas
-    )
+def _start_stage(handler, inbox, outbox, workers, errors):
+    def worker():
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Leave the sentinel in place for the other workers of this stage
+                inbox.put(_DONE)
+                return
+            doc, payload = item
+            try:
+                result = handler(doc, payload)
+            except Exception as e:
+                print(f"Failed to embed {doc['name']}: {e}")
+                errors[doc["id"]] = str(e)
+                continue
+            if result is not None:
+                outbox.put((doc, result))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for t in threads:
+        t.start()
+    return threads
+
+def run_embedding_pipeline(docs):
+    # docs: list of {"id", "name", "year", "file_url"} dicts; returns {document_id: error or None}
+    errors = {}
+    started = time.monotonic()
+
+    def download(doc, _):
+        return download_pdf(doc["file_url"]).getvalue()
+
+    def extract(doc, pdf_bytes):
+        chunks = extract_chunks(pdf_bytes)
+        if not chunks:
+            print(f"No text extracted for {doc['id']}")
+            errors[doc["id"]] = "No text extracted"
+            return None
+        return chunks
+
+    def embed(doc, chunks):
+        print(f" Generating embeddings for {len(chunks)} chunks of {doc['name']}...")
+        return chunks, embed_chunks(chunks)
+
+    def store(doc, payload):
+        chunks, embeddings = payload
+        store_chunks(doc["id"], chunks, embeddings, doc.get("year"))
+        print(f" Embedded {len(chunks)} chunks for document {doc['id']}")
+        return doc["id"]
+
+    stages = [
+        (download, DOWNLOAD_WORKERS),
+        (extract, EXTRACT_WORKERS),
+        (embed, EMBED_WORKERS),
+        # Chroma writes go through a single thread
+        (store, 1),
+    ]
+    queues = [queue.Queue(maxsize=QUEUE_SIZE) for _ in stages] + [queue.Queue()]
+
+    running = [
+        _start_stage(handler, queues[i], queues[i + 1], workers, errors)
+        for i, (handler, workers) in enumerate(stages)
+    ]
 
-    print(f" Embedded {len(chunks)} chunks for document {document_id}")
+    for doc in docs:
+        queues[0].put((doc, None))
+    queues[0].put(_DONE)
+
+    for i, threads in enumerate(running):
+        for t in threads:
+            t.join()
+        queues[i + 1].put(_DONE)
+
+    results = {doc["id"]: errors.get(doc["id"], "Not processed") for doc in docs}
+    while (item := queues[-1].get()) is not _DONE:
+        results[item[1]] = None
+
+    elapsed = time.monotonic() - started
+    done = sum(1 for error in results.values() if error is None)
+    rate = done / (elapsed / 60) if elapsed > 0 else 0
+    print(f"Embedded {done}/{len(docs)} documents in {elapsed:.1f}s ({rate:.1f} docs/min)")
+    print(f"Embedding cache: {embedding_cache.stats()}")
+    return results
+
+def mark_embedded(db: Session, document_ids):
+    db.query(Document).filter(Document.id.in_(document_ids)).update(
+        {"status": 2}, synchronize_session=False  # Mark as embedded
+    )
 
 def run_embedding_job():
+    # One-off pass over every pending document; the job worker is the normal path
     db: Session = SessionLocal()
-    docs = db.query(Document).filter(Document.status == 1).all()
+    docs = db.query(Document.id, Document.name, Document.year, Document.file_url).filter(Document.status == 1).all()
 
     if not docs:
         print("No new documents to embed.")
         db.close()
         return
 
-    for doc in docs:
+    results = run_embedding_pipeline([
+        {"id": doc.id, "name": doc.name, "year": doc.year, "file_url": doc.file_url} for doc in docs
+    ])
+
+    embedded = [document_id for document_id, error in results.items() if error is None]
+    if embedded:
         try:
-            ingest_to_chroma(doc.id, doc.file_url)
-            doc.status = 2  # Mark as embedded
+            mark_embedded(db, embedded)
             db.commit()
         except Exception as e:
-            print(f"Failed to embed {doc.name}: {e}")
+            print(f"Failed to mark documents as embedded: {e}")
             db.rollback()
 
     db.close()
-
-def start_embedding_cron():
-    #changed this due to computing costs, should be just 5
-    schedule.every(5000000000000000000000000000000000000000000000000000000).minutes.do(run_embedding_job)
-    print("Embedding cron started: runs every 5 minutes")
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
@@ -1,18 +1,27 @@
 import os
 import uuid
-import time
 import json
-import schedule
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from database.database import SessionLocal
 from database.models import Document, SaccoMetric
 from openai import OpenAI
-from chromadb import PersistentClient
+from utils.metric_rollups import apply_metric
+from utils.embeddings import embed_query
+from utils.vector_store import get_vector_store
+from utils.rate_limit import RateLimiter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-chroma_client = PersistentClient(path=".chroma")
+
+# Extraction calls run in parallel, throttled to stay inside the account's request quota
+METRICS_CONCURRENCY = int(os.getenv("METRICS_CONCURRENCY") or 4)
+METRICS_RATE_PER_MINUTE = float(os.getenv("METRICS_RATE_PER_MINUTE") or 60)
+llm_rate_limiter = RateLimiter(METRICS_RATE_PER_MINUTE, burst=METRICS_CONCURRENCY)
+
+METRICS_PROBE = "Summarize key SACCO financial metrics from this document"
 
 
 def clean_metrics(metrics_dict):
@@ -64,6 +73,7 @@ TEXT:
 {joined}
 """
 
+    llm_rate_limiter.acquire()
     response = client.chat.completions.create(
         model="gpt-3.5-turbo",
         temperature=0,
@@ -90,23 +100,66 @@ TEXT:
         print(f"Error parsing JSON: {e}")
         return clean_metrics({})
 
-def fetch_relevant_chunks(document_id, top_k=5):
-    collection = chroma_client.get_or_create_collection(name="sacco_docs")
+@lru_cache(maxsize=1)
+def probe_embedding():
+    # The probe never changes, so it is embedded once per process
+    return embed_query(METRICS_PROBE)
 
-    embedding = client.embeddings.create(
-        model="text-embedding-ada-002",
-        input="Summarize key SACCO financial metrics from this document"
-    ).data[0].embedding
+def fetch_relevant_chunks(document_id, top_k=5, year=None):
+    return get_vector_store().query(document_id, probe_embedding(), top_k=top_k, year=year)
+
+def documents_with_metrics(db: Session, docs):
+    # One query for the whole batch instead of one existence check per document
+    if not docs:
+        return set()
+    rows = db.query(SaccoMetric.document_id, SaccoMetric.year).filter(
+        SaccoMetric.document_id.in_([doc.id for doc in docs])
+    ).all()
+    existing = {(row.document_id, row.year) for row in rows}
+    return {doc.id for doc in docs if (doc.id, doc.year) in existing}
+
+
+def fetch_metrics(document_id, name, year=None):
+    # Network-only half of extraction, safe to run off the session's thread
+    print(f"Processing: {name}")
+    chunks = fetch_relevant_chunks(document_id, year=year)
+    if not chunks:
+        raise ValueError(f"No chunks found for: {name}")
+    return ask_gpt_for_metrics(chunks)
+
+
+def fetch_metrics_concurrently(docs):
+    # Returns {document_id: metrics dict or the exception raised}; the batch takes
+    # about as long as its slowest call rather than the sum of all of them
+    def run(doc):
+        try:
+            return fetch_metrics(doc.id, doc.name, doc.year)
+        except Exception as e:
+            return e
 
-    results = collection.query(
-        query_embeddings=[embedding],
-        n_results=top_k,
-        where={"document_id": document_id}
+    if not docs:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(METRICS_CONCURRENCY, len(docs)))) as pool:
+        return dict(zip([doc.id for doc in docs], pool.map(run, docs)))
+
+
+def save_metrics(db: Session, doc: Document, metrics):
+    # Adds the document's metrics and marks it processed; the caller commits
+    metric = SaccoMetric(
+        id=str(uuid.uuid4()),
+        document_id=doc.id,
+        year=doc.year,
+        **metrics
     )
+    db.add(metric)
+    apply_metric(db, metric)
+
+    doc.status = 3
+    return metric
 
-    return results['documents'][0] if results and results['documents'] else []
 
 def run_metrics_job():
+    # One-off pass over every embedded document; the job worker is the normal path
     db: Session = SessionLocal()
     docs = db.query(Document).filter(Document.status == 2).all()
 
@@ -115,34 +168,22 @@ def run_metrics_job():
         db.close()
         return
 
+    done = documents_with_metrics(db, docs)
     for doc in docs:
-        try:
-            existing = db.query(SaccoMetric).filter(
-                        SaccoMetric.document_id == doc.id,
-                        SaccoMetric.year == doc.year
-                    ).first()
-            
-            if existing:
-                print(f"Skipping {doc.name} (already has metrics)")
-                continue
-
-            print(f"Processing: {doc.name}")
-            chunks = fetch_relevant_chunks(doc.id)
-
-            if not chunks:
-                print(f"No chunks found for: {doc.name}")
-                continue
-
-            metrics = ask_gpt_for_metrics(chunks)
-
-            db.add(SaccoMetric(
-                id=str(uuid.uuid4()),
-                document_id=doc.id,
-                year=doc.year,
-                **metrics
-            ))
-
+        if doc.id in done:
+            print(f"Skipping {doc.name} (already has metrics)")
             doc.status = 3
+    db.commit()
+
+    pending = [doc for doc in docs if doc.id not in done]
+    results = fetch_metrics_concurrently(pending)
+
+    for doc in pending:
+        result = results[doc.id]
+        try:
+            if isinstance(result, Exception):
+                raise result
+            save_metrics(db, doc, result)
             db.commit()
             print(f"Metrics saved for: {doc.name}")
 
@@ -151,12 +192,3 @@ def run_metrics_job():
             db.rollback()
 
     db.close()
-
-
-def start_dashboard_cron():
-    #Changed this due to compute costs incurred should be 2
-    schedule.every(200000000000000000000000000000000).minutes.do(run_metrics_job)
-    print("Dashboard Metrics Cron Started (every 5 minutes)")
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
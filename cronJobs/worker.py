@@ -0,0 +1,203 @@
+# cronJobs/worker.py
+# Standalone job worker: python -m cronJobs.worker
+# Run as many as needed, on any host that shares the database and vector store.
+
+import os
+import signal
+import socket
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from database.database import SessionLocal
+from database.models import Document, Job
+from utils import job_queue
+from utils.job_queue import EMBED_DOCUMENT, EXTRACT_METRICS, SUMMARIZE_CHAT
+from utils.chat_history import fold_history
+from cronJobs.embedder import run_embedding_pipeline, mark_embedded
+from cronJobs.metricsextractor import (
+    METRICS_CONCURRENCY, documents_with_metrics, fetch_metrics_concurrently, save_metrics
+)
+
+load_dotenv()
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS") or 2)
+# Embedding jobs are claimed in batches so the download/extract/embed pipeline stays full
+JOB_EMBED_BATCH = int(os.getenv("JOB_EMBED_BATCH") or 8)
+JOB_SUMMARY_BATCH = int(os.getenv("JOB_SUMMARY_BATCH") or 4)
+# Uploads and finished ingestion enqueue their own follow-up jobs; the sweep only
+# catches documents left pending outside the queue (e.g. uploaded before it existed); 0 disables
+JOB_SWEEP_SECONDS = float(os.getenv("JOB_SWEEP_SECONDS") or 300)
+
+
+class LeaseKeeper:
+    # Extends the lease on held jobs until the work is done, so long documents
+    # are not reclaimed by another worker mid-run
+
+    def __init__(self, job_ids):
+        self.job_ids = list(job_ids)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        interval = max(1, job_queue.JOB_LEASE_SECONDS / 3)
+        while not self.stopped.wait(interval):
+            db = SessionLocal()
+            try:
+                job_queue.extend_lease(db, WORKER_ID, self.job_ids)
+            except Exception as e:
+                print(f"Failed to extend job lease: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_embed_jobs(db: Session, jobs):
+    docs = db.query(Document.id, Document.name, Document.year, Document.file_url).filter(
+        Document.id.in_([job.document_id for job in jobs])
+    ).all()
+    results = run_embedding_pipeline([
+        {"id": doc.id, "name": doc.name, "year": doc.year, "file_url": doc.file_url} for doc in docs
+    ])
+
+    embedded = [document_id for document_id, error in results.items() if error is None]
+    if embedded:
+        mark_embedded(db, embedded)
+        # Committed with the status change, so metrics follow straight after ingestion
+        for document_id in embedded:
+            job_queue.enqueue(db, EXTRACT_METRICS, document_id)
+    for job in jobs:
+        if job.document_id not in results:
+            job_queue.complete(db, job)  # Document was deleted
+        elif results[job.document_id] is None:
+            job_queue.complete(db, job)
+        else:
+            job_queue.fail(db, job, results[job.document_id])
+    db.commit()
+
+
+def run_extract_jobs(db: Session, jobs):
+    docs = db.query(Document).filter(Document.id.in_([job.document_id for job in jobs])).all()
+    done = documents_with_metrics(db, docs)
+    pending = [doc for doc in docs if doc.id not in done]
+    for doc in docs:
+        if doc.id in done:
+            print(f"Skipping {doc.name} (already has metrics)")
+            doc.status = 3
+    db.commit()
+
+    results = fetch_metrics_concurrently(pending)
+
+    for job in jobs:
+        job_id, result = job.id, results.get(job.document_id)
+        try:
+            if isinstance(result, Exception):
+                raise result
+            if result is not None:
+                doc = db.query(Document).filter(Document.id == job.document_id).first()
+                save_metrics(db, doc, result)
+                print(f"Metrics saved for: {doc.name}")
+            job_queue.complete(db, job)
+            db.commit()
+        except Exception as e:
+            print(f" Error saving metrics for job {job_id}: {e}")
+            db.rollback()
+            job = db.query(Job).filter(Job.id == job_id).first()
+            job_queue.fail(db, job, str(e))
+            db.commit()
+
+
+def run_summary_jobs(db: Session, jobs):
+    for job in jobs:
+        job_id = job.id
+        try:
+            folded = fold_history(db, job.document_id, job.user_id)
+            if folded:
+                print(f"Folded {folded} chat turns into the summary for document {job.document_id}")
+            job_queue.complete(db, job)
+            db.commit()
+        except Exception as e:
+            print(f" Error summarizing chat for job {job_id}: {e}")
+            db.rollback()
+            job = db.query(Job).filter(Job.id == job_id).first()
+            job_queue.fail(db, job, str(e))
+            db.commit()
+
+
+def sweep(db: Session):
+    pending = [
+        (EMBED_DOCUMENT, db.query(Document.id).filter(Document.status == 1).all()),
+        (EXTRACT_METRICS, db.query(Document.id).filter(Document.status == 2).all()),
+    ]
+    enqueued = 0
+    for kind, rows in pending:
+        for row in rows:
+            if job_queue.enqueue(db, kind, row.id):
+                enqueued += 1
+    db.commit()
+    if enqueued:
+        print(f"Sweep enqueued {enqueued} jobs")
+
+
+def run_once() -> bool:
+    # Returns True when a job was processed, so the loop only sleeps when idle
+    db: Session = SessionLocal()
+    try:
+        jobs = job_queue.claim(db, WORKER_ID, [EMBED_DOCUMENT], limit=JOB_EMBED_BATCH)
+        if jobs:
+            with LeaseKeeper(job.id for job in jobs):
+                run_embed_jobs(db, jobs)
+            return True
+
+        jobs = job_queue.claim(db, WORKER_ID, [EXTRACT_METRICS], limit=METRICS_CONCURRENCY)
+        if jobs:
+            with LeaseKeeper(job.id for job in jobs):
+                run_extract_jobs(db, jobs)
+            return True
+
+        jobs = job_queue.claim(db, WORKER_ID, [SUMMARIZE_CHAT], limit=JOB_SUMMARY_BATCH)
+        if jobs:
+            with LeaseKeeper(job.id for job in jobs):
+                run_summary_jobs(db, jobs)
+            return True
+        return False
+    finally:
+        db.close()
+
+
+def run_worker(stop: threading.Event):
+    print(f"Job worker {WORKER_ID} started")
+    next_sweep = 0
+    while not stop.is_set():
+        try:
+            if JOB_SWEEP_SECONDS and time.monotonic() >= next_sweep:
+                db = SessionLocal()
+                try:
+                    sweep(db)
+                finally:
+                    db.close()
+                next_sweep = time.monotonic() + JOB_SWEEP_SECONDS
+
+            if not run_once():
+                stop.wait(JOB_POLL_SECONDS)
+        except Exception as e:
+            print(f"Job worker error: {e}")
+            stop.wait(JOB_POLL_SECONDS)
+    print(f"Job worker {WORKER_ID} stopped")
+
+
+if __name__ == "__main__":
+    stop = threading.Event()
+    # Finish the jobs in hand, then exit; unfinished leases expire and are retried elsewhere
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    run_worker(stop)
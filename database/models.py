@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, Integer, Text , Float , ForeignKey , UniqueConstraint
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Text , Float , ForeignKey , UniqueConstraint , Index
 from sqlalchemy.sql import func
 from database.database import Base
 
@@ -26,6 +26,14 @@ class Document(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # The listing pages newest first, optionally filtered by one of these columns
+    __table_args__ = (
+        Index('ix_documents_created_at_id', 'created_at', 'id'),
+        Index('ix_documents_year_created_at_id', 'year', 'created_at', 'id'),
+        Index('ix_documents_status_created_at_id', 'status', 'created_at', 'id'),
+        Index('ix_documents_uploaded_by_created_at_id', 'uploaded_by', 'created_at', 'id'),
+    )
+
 class SaccoMetric(Base):
     __tablename__ = 'sacco_metrics'
 
@@ -45,7 +53,48 @@ class SaccoMetric(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('document_id', 'year', name='_doc_year_uc'),)
+    __table_args__ = (
+        UniqueConstraint('document_id', 'year', name='_doc_year_uc'),
+        Index('ix_sacco_metrics_year_id', 'year', 'id'),
+    )
+
+
+class SaccoMetricRollup(Base):
+    __tablename__ = 'sacco_metric_rollups'
+
+    # One row per year, plus year 0 for the whole table
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    metric_count = Column(Integer, nullable=False, default=0)
+
+    sum_membership_count = Column(Float, nullable=False, default=0)
+    sum_loan_book_value = Column(Float, nullable=False, default=0)
+    sum_asset_base = Column(Float, nullable=False, default=0)
+    sum_deposits = Column(Float, nullable=False, default=0)
+    sum_dividend_rate = Column(Float, nullable=False, default=0)
+    sum_interest_rebate = Column(Float, nullable=False, default=0)
+    sum_revenue = Column(Float, nullable=False, default=0)
+    sum_portfolio_at_risk = Column(Float, nullable=False, default=0)
+
+    avg_membership_count = Column(Float, nullable=False, default=0)
+    avg_loan_book_value = Column(Float, nullable=False, default=0)
+    avg_asset_base = Column(Float, nullable=False, default=0)
+    avg_deposits = Column(Float, nullable=False, default=0)
+    avg_dividend_rate = Column(Float, nullable=False, default=0)
+    avg_interest_rebate = Column(Float, nullable=False, default=0)
+    avg_revenue = Column(Float, nullable=False, default=0)
+    avg_portfolio_at_risk = Column(Float, nullable=False, default=0)
+
+    # Non-null values behind each average, so NULL metrics are skipped as AVG() would
+    count_membership_count = Column(Integer, nullable=False, default=0, server_default='0')
+    count_loan_book_value = Column(Integer, nullable=False, default=0, server_default='0')
+    count_asset_base = Column(Integer, nullable=False, default=0, server_default='0')
+    count_deposits = Column(Integer, nullable=False, default=0, server_default='0')
+    count_dividend_rate = Column(Integer, nullable=False, default=0, server_default='0')
+    count_interest_rebate = Column(Integer, nullable=False, default=0, server_default='0')
+    count_revenue = Column(Integer, nullable=False, default=0, server_default='0')
+    count_portfolio_at_risk = Column(Integer, nullable=False, default=0, server_default='0')
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class Chat(Base):
@@ -56,4 +105,55 @@ class Chat(Base):
     document_id = Column(String(36), ForeignKey("documents.id"), nullable=False)
     sender = Column(String(10), nullable=False)
     message = Column(Text, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Both rows of an exchange share a timestamp; this orders them, and exchanges
+    # written within the same second (microseconds at write time, reply = question + 1)
+    sequence = Column(BigInteger, nullable=False, server_default='0')
+
+    __table_args__ = (
+        Index('ix_chats_document_user_timestamp_sequence_id', 'document_id', 'user_id', 'timestamp', 'sequence', 'id'),
+    )
+
+
+class ChatSummary(Base):
+    __tablename__ = 'chat_summaries'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, index=True)
+    user_id = Column(String(36), nullable=False)
+    document_id = Column(String(36), ForeignKey("documents.id"), nullable=False)
+    summary = Column(Text, nullable=False)
+    # Every chat up to and including this (timestamp, sequence, id) is folded into the
+    # summary; summaries written before sequence existed only carry the timestamp
+    summarized_until = Column(DateTime(timezone=True), nullable=False)
+    summarized_until_sequence = Column(BigInteger)
+    summarized_until_id = Column(String(36))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (UniqueConstraint('document_id', 'user_id', name='_summary_doc_user_uc'),)
+
+
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, index=True)
+    kind = Column(String(50), nullable=False)
+    document_id = Column(String(36), ForeignKey("documents.id"))
+    # Set for per-user work on a document, such as folding a chat into its summary
+    user_id = Column(String(36))
+    # 0 queued, 1 running, 2 done, 3 failed
+    status = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False)
+    locked_by = Column(String(100))
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+    # Set while a job is queued or running so the same work is never enqueued twice
+    dedupe_key = Column(String(100), unique=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (Index('ix_jobs_status_run_after', 'status', 'run_after'),)
@@ -2,10 +2,11 @@ from fastapi import FastAPI
 from database.models import Base
 from database.database import engine
 from fastapi.middleware.cors import CORSMiddleware
+import os
 import threading
 from routes.api import api_router
-from cronJobs.embedder import start_embedding_cron 
-from cronJobs.metricsextractor import start_dashboard_cron
+from cronJobs.worker import run_worker
+from utils.http_client import close_client, close_async_client
 
 app = FastAPI()
 
@@ -24,8 +25,20 @@ Base.metadata.create_all(bind=engine)
 # Routes
 app.include_router(api_router)
 
-# Background cron tasks
+# Ingestion and metric extraction run in the job worker, started separately:
+# `python -m cronJobs.worker` or the `worker` service in docker-compose.yml. Without
+# one, uploads stay queued. RUN_WORKER_IN_PROCESS=true runs a worker inside each API
+# process instead, for single-process development setups.
+RUN_WORKER_IN_PROCESS = (os.getenv("RUN_WORKER_IN_PROCESS") or "false").lower() == "true"
+worker_stop = threading.Event()
+
 @app.on_event("startup")
-def schedule_background_tasks():
-    threading.Thread(target=start_dashboard_cron, daemon=True).start() 
-    threading.Thread(target=start_embedding_cron, daemon=True).start()
+def start_in_process_worker():
+    if RUN_WORKER_IN_PROCESS:
+        threading.Thread(target=run_worker, args=(worker_stop,), daemon=True).start()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    worker_stop.set()
+    await close_async_client()
+    close_client()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from controllers import userController,documentController,saccoMetricController,uploadController,chatController,dashboardController
+from controllers import userController,documentController,saccoMetricController,uploadController,chatController,dashboardController,statsController
 
 api_router = APIRouter()
 
@@ -10,4 +10,5 @@ api_router.include_router(saccoMetricController.router, prefix="/api/v1/metrics"
 api_router.include_router(uploadController.router, prefix="/api/v1/upload", tags=["Uploads"])
 api_router.include_router(chatController.router, prefix="/api/v1", tags=["Chat"]) 
 api_router.include_router(dashboardController.router, prefix="/api/v1/dashboard", tags=["Dashboard"]) 
+api_router.include_router(statsController.router, prefix="/api/v1/stats", tags=["Stats"])
 
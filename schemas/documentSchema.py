@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class DocumentCreate(BaseModel):
@@ -19,3 +19,7 @@ class DocumentResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+class DocumentPage(BaseModel):
+    items: List[DocumentResponse]
+    nextCursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class SaccoMetricCreate(BaseModel):
@@ -20,3 +20,10 @@ class SaccoMetricResponse(SaccoMetricCreate):
 
     class Config:
         orm_mode = True
+
+class SaccoMetricBulkUpsert(BaseModel):
+    items: List[SaccoMetricCreate]
+
+class SaccoMetricPage(BaseModel):
+    items: List[SaccoMetricResponse]
+    nextCursor: Optional[str] = None
@@ -0,0 +1,62 @@
+# Compares embedding providers on single-query latency and bulk ingestion throughput.
+#
+#   python scripts/bench_embeddings.py --providers hash,local,openai --queries 200 --chunks 2000
+#
+# Caches are bypassed; every call goes to the provider. Pair with
+# scripts/stub_openai_server.py (OPENAI_BASE_URL) to measure the client side only.
+import sys
+import os
+import time
+import argparse
+import statistics
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.embeddings import create_provider, batch_by_tokens
+from utils.tokenizer import count_tokens
+
+WORDS = ("loan deposit member dividend rebate surplus asset liability portfolio risk "
+         "interest revenue expense capital reserve share savings audit board year").split()
+
+
+def synthetic_text(i: int, words: int) -> str:
+    return " ".join(WORDS[(i * 7 + j * 3) % len(WORDS)] + str((i + j) % 97) for j in range(words))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench(name, queries, chunks):
+    provider = create_provider(name)
+    provider.embed(["warm up"])
+
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        provider.embed([f"what was the loan book value in {2000 + i % 25} {i}"])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    texts = [synthetic_text(i, 220) for i in range(chunks)]
+    batches = [[texts[i] for i in batch] for batch in batch_by_tokens([count_tokens(t) for t in texts])]
+    started = time.perf_counter()
+    for batch in batches:
+        provider.embed(batch)
+    elapsed = time.perf_counter() - started
+
+    print(f"{provider.name:<32} p50 {statistics.median(latencies):8.2f}ms  "
+          f"p99 {percentile(latencies, 99):8.2f}ms  ingest {chunks / elapsed:10.1f} chunks/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--providers", default="hash,local")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name in args.providers.split(","):
+        try:
+            bench(name, args.queries, args.chunks)
+        except Exception as e:
+            print(f"{name:<32} failed: {e}")
@@ -0,0 +1,54 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from io import BytesIO
+import pdfplumber
+from utils import pdf_utils
+
+
+def sequential(pdf_bytes):
+    # The pre-parallel path: one process, every page held until the end
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+
+def parallel(pdf_bytes):
+    return "\n".join(text for _, text in pdf_utils.extract_pages(pdf_bytes))
+
+
+def timed(label, fn, pdf_bytes, pages):
+    start = time.perf_counter()
+    text = fn(pdf_bytes)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:8.2f}s {pages / elapsed:10.1f} pages/sec")
+    return text
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python scripts/bench_pdf_extraction.py <file.pdf>")
+        sys.exit(1)
+
+    with open(sys.argv[1], "rb") as f:
+        pdf_bytes = f.read()
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        pages = len(pdf.pages)
+
+    # Point the page cache at a scratch directory so the cold run is really cold
+    cache_dir = tempfile.mkdtemp(prefix="bench-pages-")
+    pdf_utils.page_cache = pdf_utils.PageCache(cache_dir)
+    # Start the pool outside the timed section
+    pdf_utils.get_extract_pool().submit(int).result()
+
+    print(f"{pages} pages, {pdf_utils.PDF_EXTRACT_WORKERS} workers, {pdf_utils.PDF_PAGES_PER_TASK} pages/task")
+    try:
+        expected = timed("sequential", sequential, pdf_bytes, pages)
+        cold = timed("parallel (cold cache)", parallel, pdf_bytes, pages)
+        warm = timed("parallel (warm cache)", parallel, pdf_bytes, pages)
+        print("output matches" if expected == cold == warm else "OUTPUT MISMATCH")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
@@ -0,0 +1,66 @@
+# Compares per-document query latency of the vector store backends.
+#
+#   python scripts/bench_vector_store.py --documents 50 --chunks 300 --dim 1536 --queries 1000
+#
+# Builds throwaway stores in a temp directory with random unit vectors, then
+# queries random documents and reports p50/p99 per backend.
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from utils.vector_store import ChromaVectorStore, NumpyVectorStore
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench(label, store, documents, queries, top_k, dim):
+    rng = np.random.default_rng(1)
+    latencies = []
+    for _ in range(queries):
+        document_id = documents[rng.integers(len(documents))]
+        embedding = rng.standard_normal(dim).astype(np.float32)
+        started = time.perf_counter()
+        store.query(document_id, embedding, top_k=top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<16} p50 {statistics.median(latencies):8.3f}ms  p99 {percentile(latencies, 99):8.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-vectors-")
+    stores = {
+        "chroma": ChromaVectorStore(path=os.path.join(root, "chroma"), collection="bench"),
+        "numpy float32": NumpyVectorStore(directory=os.path.join(root, "np32"), collection="bench", dtype="float32"),
+        "numpy float16": NumpyVectorStore(directory=os.path.join(root, "np16"), collection="bench", dtype="float16"),
+    }
+    try:
+        rng = np.random.default_rng(0)
+        documents = [f"doc-{i}" for i in range(args.documents)]
+        for document_id in documents:
+            vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            texts = [f"{document_id} chunk {i}" for i in range(args.chunks)]
+            for label, store in stores.items():
+                store.add(document_id, texts, vectors.tolist() if label == "chroma" else vectors)
+
+        print(f"{args.documents} documents x {args.chunks} chunks, dim {args.dim}, {args.queries} queries")
+        for label, store in stores.items():
+            bench(label, store, documents, args.queries, args.top_k, args.dim)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
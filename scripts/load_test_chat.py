@@ -0,0 +1,68 @@
+# Ramps concurrent POST /chat/{document_id} requests and reports latency and
+# throughput per level, to find where the chat path stops scaling.
+#
+#   python scripts/load_test_chat.py --base-url http://localhost:8000 \
+#       --document-id <id> --levels 10,40,100,400,1000
+#
+# Pair with scripts/stub_openai_server.py to take OpenAI latency out of the picture.
+import time
+import asyncio
+import argparse
+import statistics
+import httpx
+
+
+async def run_level(client, url, user_id, concurrency, total, timeout):
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                # Distinct queries and users so neither the query-embedding cache nor
+                # a growing chat history skews the numbers
+                res = await client.post(url, timeout=timeout, json={
+                    "query": f"load test question {i} {time.time()}",
+                    "userId": f"{user_id}-{concurrency}-{i}",
+                })
+                if res.status_code != 200:
+                    errors += 1
+                    return
+            except httpx.HTTPError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies) if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(f"concurrency={concurrency:5d} ok={len(latencies):5d} errors={errors:4d} "
+          f"p50={p50:6.2f}s p99={p99:6.2f}s throughput={len(latencies) / elapsed:7.1f} req/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--document-id", required=True)
+    parser.add_argument("--user-id", default="load-test")
+    parser.add_argument("--levels", default="10,40,100,400,1000")
+    parser.add_argument("--requests-per-level", type=int, default=0,
+                        help="defaults to 2x the concurrency of each level")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    url = f"{args.base_url}/api/v1/chat/{args.document_id}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits) as client:
+        for level in (int(v) for v in args.levels.split(",")):
+            await run_level(client, url, args.user_id, level, args.requests_per_level or level * 2, args.timeout)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
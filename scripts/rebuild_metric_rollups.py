@@ -0,0 +1,17 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.database import SessionLocal
+from database.models import SaccoMetricRollup
+from utils.metric_rollups import rebuild_rollups
+
+db = SessionLocal()
+
+try:
+    rebuild_rollups(db)
+    db.commit()
+    count = db.query(SaccoMetricRollup).count()
+    print(f"Rebuilt {count} metric rollup rows.")
+finally:
+    db.close()
@@ -0,0 +1,57 @@
+# Minimal OpenAI-compatible stand-in for load and latency testing.
+# Run with: uvicorn scripts.stub_openai_server:app --port 9100
+# and point the API at it with OPENAI_BASE_URL=http://localhost:9100/v1
+import os
+import json
+import time
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+EMBEDDING_LATENCY = float(os.getenv("STUB_EMBEDDING_LATENCY", 0.15))
+COMPLETION_LATENCY = float(os.getenv("STUB_COMPLETION_LATENCY", 2.0))
+EMBEDDING_DIM = int(os.getenv("STUB_EMBEDDING_DIM", 1536))
+
+app = FastAPI()
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    await asyncio.sleep(EMBEDDING_LATENCY)
+    return {
+        "object": "list",
+        "model": body.get("model"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": [((len(text) + i) % 7) / 7.0] * EMBEDDING_DIM}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    words = "The dividend rate for the year was 12 percent .".split()
+    base = {"id": "stub", "created": int(time.time()), "model": body.get("model")}
+
+    if not body.get("stream"):
+        await asyncio.sleep(COMPLETION_LATENCY)
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": " ".join(words)}}],
+        }
+
+    async def events():
+        for word in words:
+            await asyncio.sleep(COMPLETION_LATENCY / len(words))
+            chunk = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
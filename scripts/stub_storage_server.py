@@ -0,0 +1,82 @@
+# Local stand-in for the Supabase storage endpoints the API uses, for testing
+# uploads and downloads without a Supabase project.
+# Run with: uvicorn scripts.stub_storage_server:app --port 9300
+# and set SUPABASE_URL=http://localhost:9300 (any SUPABASE_KEY / SUPABASE_BUCKET).
+import os
+import uuid
+import base64
+from fastapi import FastAPI, Request, Response, HTTPException
+from fastapi.responses import FileResponse
+
+STORAGE_DIR = os.getenv("STUB_STORAGE_DIR", ".stub_storage")
+
+app = FastAPI()
+uploads = {}
+
+
+def object_path(bucket: str, path: str) -> str:
+    full = os.path.abspath(os.path.join(STORAGE_DIR, bucket, path))
+    if not full.startswith(os.path.abspath(STORAGE_DIR)):
+        raise HTTPException(status_code=400, detail="Invalid path")
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    return full
+
+
+@app.post("/storage/v1/object/{bucket}/{path:path}")
+async def put_object(bucket: str, path: str, request: Request):
+    size = 0
+    with open(object_path(bucket, path), "wb") as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+            size += len(chunk)
+    return {"Key": f"{bucket}/{path}", "size": size}
+
+
+@app.get("/storage/v1/object/public/{bucket}/{path:path}")
+def get_object(bucket: str, path: str):
+    full = object_path(bucket, path)
+    if not os.path.exists(full):
+        raise HTTPException(status_code=404, detail="Object not found")
+    return FileResponse(full, media_type="application/pdf")
+
+
+@app.post("/storage/v1/upload/resumable", status_code=201)
+def create_upload(request: Request, response: Response):
+    metadata = {}
+    for pair in request.headers.get("upload-metadata", "").split(","):
+        if pair:
+            key, value = pair.split(" ", 1)
+            metadata[key] = base64.b64decode(value).decode()
+
+    upload_id = uuid.uuid4().hex
+    uploads[upload_id] = {
+        "length": int(request.headers["upload-length"]),
+        "offset": 0,
+        "path": object_path(metadata["bucketName"], metadata["objectName"]),
+    }
+    open(uploads[upload_id]["path"], "wb").close()
+    response.headers["Location"] = str(request.url_for("patch_upload", upload_id=upload_id))
+    response.headers["Tus-Resumable"] = "1.0.0"
+
+
+@app.head("/storage/v1/upload/resumable/{upload_id}")
+def head_upload(upload_id: str):
+    upload = uploads.get(upload_id)
+    if not upload:
+        raise HTTPException(status_code=404)
+    return Response(headers={"Upload-Offset": str(upload["offset"]), "Upload-Length": str(upload["length"])})
+
+
+@app.patch("/storage/v1/upload/resumable/{upload_id}", name="patch_upload", status_code=204)
+async def patch_upload(upload_id: str, request: Request):
+    upload = uploads.get(upload_id)
+    if not upload:
+        raise HTTPException(status_code=404)
+    if int(request.headers["upload-offset"]) != upload["offset"]:
+        raise HTTPException(status_code=409, detail="Offset mismatch")
+
+    with open(upload["path"], "ab") as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+            upload["offset"] += len(chunk)
+    return Response(status_code=204, headers={"Upload-Offset": str(upload["offset"]), "Tus-Resumable": "1.0.0"})
@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+# Settings for the modules under test, set before any of them is imported: a
+# throwaway SQLite database, hash embeddings, and scratch directories for on-disk state
+_scratch = tempfile.mkdtemp(prefix="sacco-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'app.db')}"
+os.environ["OPENAI_API_KEY"] = "test"
+os.environ["JWT_KEY"] = "test"
+os.environ["EMBEDDING_PROVIDER"] = "hash"
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_scratch, "embeddings.db")
+os.environ["VECTOR_STORE"] = "numpy"
+os.environ["NUMPY_VECTOR_DIR"] = os.path.join(_scratch, "vectors")
+os.environ["CHROMA_PATH"] = os.path.join(_scratch, "chroma")
+os.environ["PDF_PAGE_CACHE_DIR"] = os.path.join(_scratch, "pages")
+os.environ["DOCUMENT_CACHE_DIR"] = os.path.join(_scratch, "documents")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+# Imported from models, as main.py does, so every table is registered
+from database.models import Base
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A file database, so separate sessions get separate connections and transactions
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from database.models import Chat, ChatSummary, Document, Job
+from utils import chat_history, job_queue
+
+
+@pytest.fixture
+def conversation(db, session_factory, monkeypatch):
+    # One word per token, and no LLM: summaries just count the turns folded so far
+    monkeypatch.setattr(chat_history, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(chat_history, "SessionLocal", session_factory)
+    monkeypatch.setattr(chat_history, "CHAT_HISTORY_TOKEN_BUDGET", 40)
+    monkeypatch.setattr(chat_history, "CHAT_SUMMARY_BATCH_TURNS", 3)
+    calls = []
+
+    def summarize(previous, turns):
+        calls.append(len(turns))
+        return f"folded {sum(calls)}"
+
+    monkeypatch.setattr(chat_history, "summarize", summarize)
+
+    db.add(Document(id="doc", name="Report", year=2020, file_url="https://example.com/r.pdf"))
+    start = datetime(2026, 1, 1)
+    for i in range(10):
+        for offset, sender in enumerate(("user", "assistant")):
+            db.add(Chat(
+                id=f"chat-{i:02d}-{offset}", user_id="user", document_id="doc", sender=sender,
+                message=" ".join([f"w{i}"] * 5), timestamp=start + timedelta(seconds=i), sequence=offset,
+            ))
+    db.commit()
+    return calls
+
+
+def build_history():
+    return asyncio.run(chat_history.build_history("doc", "user"))
+
+
+def test_build_history_queues_a_summary_instead_of_calling_the_llm(db, conversation):
+    history = build_history()
+
+    assert conversation == []
+    # The newest turns that fit the budget, starting on a question
+    assert [turn["role"] for turn in history][0] == "user"
+    assert sum(len(turn["content"].split()) for turn in history) <= 40
+    assert history[-1]["content"].startswith("w9")
+
+    job = db.query(Job).one()
+    assert (job.kind, job.document_id, job.user_id) == (job_queue.SUMMARIZE_CHAT, "doc", "user")
+
+    # Later requests do not queue a second job for the same conversation
+    build_history()
+    assert db.query(Job).count() == 1
+
+
+def test_fold_history_folds_the_backlog_and_moves_the_mark(db, conversation):
+    folded = chat_history.fold_history(db, "doc", "user")
+
+    # Down to half the budget, in batches of three turns
+    assert folded == 16
+    assert conversation == [3, 3, 3, 3, 3, 1]
+    summary = db.query(ChatSummary).one()
+    assert (summary.summary, summary.summarized_until_id) == ("folded 16", "chat-07-1")
+
+    history = build_history()
+    assert history[0] == {"role": "system", "content": "Summary of the earlier conversation:\nfolded 16"}
+    assert [turn["content"][:2] for turn in history[1:]] == ["w8", "w8", "w9", "w9"]
+    assert db.query(Job).count() == 0
+
+    # Nothing left over budget, so a second run is a no-op
+    assert chat_history.fold_history(db, "doc", "user") == 0
+
+
+def test_save_summary_updates_a_row_created_concurrently(db, session_factory, conversation, monkeypatch):
+    last_row = db.query(Chat).filter(Chat.id == "chat-03-1").one()
+    other = session_factory()
+    chat_history.save_summary(other, "doc", "user", "theirs", last_row)
+    other.close()
+
+    # This writer looked before the other one committed
+    find_summary = chat_history._find_summary
+    lookups = []
+
+    def stale_find(db, document_id, user_id):
+        lookups.append(document_id)
+        return None if len(lookups) == 1 else find_summary(db, document_id, user_id)
+
+    monkeypatch.setattr(chat_history, "_find_summary", stale_find)
+    chat_history.save_summary(db, "doc", "user", "ours", last_row)
+
+    db.expire_all()
+    summary = db.query(ChatSummary).one()
+    assert (summary.summary, summary.summarized_until_id) == ("ours", "chat-03-1")
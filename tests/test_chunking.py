@@ -0,0 +1,75 @@
+import pytest
+from utils import chunking
+from utils.chunking import iter_chunks
+
+
+class CharEncoder:
+    # One token per character, so offsets map straight back to the text
+    def encode(self, text):
+        return [ord(c) for c in text]
+
+    def decode(self, tokens):
+        return "".join(chr(t) for t in tokens)
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "get_encoder", lambda name: CharEncoder())
+
+
+def page_of_each_token(pages):
+    # The newline joining a page to the previous one is tokenized with that page
+    owners = []
+    for page_number, text in pages:
+        if text:
+            owners.extend([page_number] * (len(text) + (1 if owners else 0)))
+    return owners
+
+
+PAGES = [(1, "a" * 40), (2, ""), (3, "b" * 7), (4, "c" * 55), (5, "d" * 3)]
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(20, 5), (16, 0), (30, 29), (200, 10)])
+def test_chunks_cover_the_text_with_exact_overlap_and_page_spans(chunk_size, overlap):
+    chunks = list(iter_chunks(iter(PAGES), chunk_size=chunk_size, overlap=overlap))
+    text = "\n".join(text for _, text in PAGES if text)
+    owners = page_of_each_token(PAGES)
+
+    offset = 0
+    for i, chunk in enumerate(chunks):
+        assert chunk["token_count"] == len(chunk["text"]) <= chunk_size
+        assert text[offset:offset + len(chunk["text"])] == chunk["text"]
+        # Spans name the pages of the first and last token
+        assert chunk["page_start"] == owners[offset]
+        assert chunk["page_end"] == owners[offset + len(chunk["text"]) - 1]
+        if i < len(chunks) - 1:
+            assert chunk["token_count"] == chunk_size
+            if overlap:
+                assert chunks[i + 1]["text"][:overlap] == chunk["text"][-overlap:]
+        offset += chunk_size - overlap
+
+    # The last window reaches the end and holds more than the overlap it repeats
+    last = chunks[-1]
+    assert text.endswith(last["text"])
+    assert len(chunks) == 1 or last["token_count"] > overlap
+
+
+def test_text_shorter_than_one_chunk_is_one_chunk():
+    assert list(iter_chunks([(2, "hello")], chunk_size=20, overlap=5)) == [
+        {"text": "hello", "page_start": 2, "page_end": 2, "token_count": 5}
+    ]
+
+
+def test_no_trailing_chunk_of_pure_overlap():
+    # 20 tokens fill one window; the 5 carried over are already in it
+    chunks = list(iter_chunks([(1, "x" * 20)], chunk_size=20, overlap=5))
+    assert len(chunks) == 1
+
+
+def test_empty_pages_yield_nothing():
+    assert list(iter_chunks([(1, ""), (2, "")])) == []
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        list(iter_chunks([(1, "text")], chunk_size=10, overlap=10))
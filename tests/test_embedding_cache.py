@@ -0,0 +1,53 @@
+import time
+from utils.embedding_cache import EmbeddingCache
+
+# Four float32 values per vector
+VECTOR_BYTES = 16
+
+
+def stored_bytes(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+
+def vector(i):
+    return [float(i)] * 4
+
+
+def test_running_total_follows_inserts_and_replacements(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_bytes=10_000)
+    cache.put_many("m", ["a", "b"], [vector(1), vector(2)])
+    # A replaced entry and a text repeated within one batch are each counted once
+    cache.put_many("m", ["b", "c", "c"], [vector(3), vector(4), vector(5)])
+    cache.put_many("other", ["a"], [vector(6)])
+
+    assert cache.stats()["bytes"] == stored_bytes(cache) == 4 * VECTOR_BYTES
+    assert cache.get_many("m", ["b", "c"]) == [vector(3), vector(5)]
+
+
+def test_total_is_read_once_at_open(tmp_path):
+    path = str(tmp_path / "cache.db")
+    EmbeddingCache(path, max_bytes=10_000).put_many("m", ["a", "b"], [vector(1), vector(2)])
+
+    cache = EmbeddingCache(path, max_bytes=10_000)
+    assert cache.stats()["bytes"] == 2 * VECTOR_BYTES
+
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.put_many("m", ["c"], [vector(3)])
+    assert not [s for s in statements if "SUM(size)" in s and "WHERE" not in s]
+    assert cache.stats()["bytes"] == stored_bytes(cache) == 3 * VECTOR_BYTES
+
+
+def test_eviction_drops_least_recently_used_and_keeps_the_total(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_bytes=10 * VECTOR_BYTES)
+    for i in range(10):
+        cache.put_many("m", [f"t{i}"], [vector(i)])
+        time.sleep(0.001)
+    cache.get_many("m", ["t0"])
+
+    cache.put_many("m", ["t10"], [vector(10)])
+
+    # Trimmed to 90%: the two oldest entries not used since go
+    assert cache.evictions == 2
+    assert cache.get_many("m", ["t0", "t1", "t2", "t3"]) == [vector(0), None, None, vector(3)]
+    assert cache.stats()["bytes"] == stored_bytes(cache) == 9 * VECTOR_BYTES
@@ -0,0 +1,53 @@
+import pytest
+from utils import embeddings
+from utils.embedding_cache import EmbeddingCache
+from utils.embeddings import batch_by_tokens, embed_texts
+
+
+@pytest.mark.parametrize("counts,max_tokens,max_inputs", [
+    ([5, 5, 5, 5], 10, 100),
+    ([3, 8, 2, 9, 1, 1, 1, 7], 10, 3),
+    ([25, 1, 1, 30], 10, 100),     # an input over the budget goes alone
+    ([1] * 10, 100, 4),
+    ([], 10, 10),
+])
+def test_batches_keep_order_and_respect_limits(counts, max_tokens, max_inputs):
+    batches = batch_by_tokens(counts, max_tokens=max_tokens, max_inputs=max_inputs)
+
+    assert [i for batch in batches for i in batch] == list(range(len(counts)))
+    for batch in batches:
+        assert len(batch) <= max_inputs
+        assert len(batch) == 1 or sum(counts[i] for i in batch) <= max_tokens
+    # Greedy: the next input would not have fit in the previous batch
+    for previous, batch in zip(batches, batches[1:]):
+        assert (len(previous) == max_inputs
+                or sum(counts[i] for i in previous) + counts[batch[0]] > max_tokens)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(embeddings, "embedding_cache", cache)
+    return cache
+
+
+def test_embed_texts_sends_each_uncached_text_once(cache, monkeypatch):
+    sent = []
+    embed = embeddings.provider.embed
+
+    def spy(texts):
+        sent.append(list(texts))
+        return embed(texts)
+
+    monkeypatch.setattr(embeddings.provider, "embed", spy)
+    texts = ["page header", "loans grew", "page header", "deposits fell", "dividends"]
+
+    vectors = embed_texts(texts, token_counts=[4, 6, 4, 6, 6])
+
+    assert vectors == embed(texts)
+    assert sorted(t for batch in sent for t in batch) == sorted(set(texts))
+
+    # Everything is cached now; only the new text goes out
+    sent.clear()
+    assert embed_texts(texts + ["revenue"], token_counts=[4, 6, 4, 6, 6, 3])[-1] == embed(["revenue"])[0]
+    assert sent == [["revenue"]]
@@ -0,0 +1,140 @@
+import os
+import httpx
+import pytest
+from contextlib import contextmanager
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from utils import http_client
+from utils.file_cache import CHUNK_SIZE, FileCache
+from utils.file_responses import content_disposition, file_response, upstream_response
+
+URL = "https://storage.example.com/report.pdf"
+BODY = bytes(range(256)) * 1024  # 256 KiB, several chunks
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    @contextmanager
+    def stream(method, url, **kwargs):
+        calls.append(url)
+        status = 404 if url.endswith("missing.pdf") else 200
+        yield httpx.Response(
+            status, content=BODY if status == 200 else b"",
+            headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+            request=httpx.Request(method, url),
+        )
+
+    monkeypatch.setattr(http_client, "stream", stream)
+    return calls
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FileCache(directory=str(tmp_path / "files"), max_bytes=10 * len(BODY))
+
+
+@pytest.fixture
+def client(cache):
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        source, meta = cache.open(URL)
+        if meta is None:
+            return upstream_response(source, "application/pdf", "Report — 2024.pdf")
+        return file_response(request, source, meta, "application/pdf", "Report — 2024.pdf")
+
+    return TestClient(app)
+
+
+def test_miss_streams_the_body_and_fills_the_cache(client, cache, upstream):
+    response = client.get("/file")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert "etag" not in response.headers
+
+    cached = client.get("/file")
+    assert cached.content == BODY
+    assert cached.headers["etag"]
+    assert upstream == [URL]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_range_and_conditional_requests(client, upstream):
+    client.get("/file")
+    etag = client.get("/file").headers["etag"]
+
+    partial = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == BODY[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+
+    suffix = client.get("/file", headers={"Range": "bytes=-5"})
+    assert (suffix.status_code, suffix.content) == (206, BODY[-5:])
+
+    unsatisfiable = client.get("/file", headers={"Range": f"bytes={len(BODY)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(BODY)}"
+
+    assert client.get("/file", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/file", headers={"If-Modified-Since": "Tue, 02 Jan 2024 00:00:00 GMT"}).status_code == 304
+
+    # A stale If-Range gets the whole current file instead of a mismatched range
+    stale = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert (stale.status_code, stale.content) == (200, BODY)
+
+
+def test_cached_handle_survives_eviction(cache, upstream):
+    cache.open(URL)[0].read()
+    handle, meta = cache.open(URL)
+
+    cache.max_bytes = 0
+    cache._evict(keep="")
+    assert not os.listdir(cache.directory)
+    assert handle.read() == BODY
+    handle.close()
+
+
+def test_abandoned_fill_leaves_nothing_behind(cache, upstream):
+    source, meta = cache.open(URL)
+    assert meta is None
+    chunks = iter(source)
+    assert len(next(chunks)) == CHUNK_SIZE
+    chunks.close()
+
+    assert not os.listdir(cache.directory)
+    assert cache.stats()["filling"] == 0
+
+
+def test_concurrent_miss_streams_without_a_second_fill(cache, upstream):
+    first, _ = cache.open(URL)
+    second, meta = cache.open(URL)
+    assert meta is None
+
+    assert second.read() == BODY
+    assert os.listdir(cache.directory) == []
+    assert first.read() == BODY
+    assert len(os.listdir(cache.directory)) == 2  # the file and its metadata
+    assert cache.open(URL)[1] is not None
+    assert cache.stats()["filling"] == 0
+
+
+def test_upstream_errors_raise_before_streaming(cache, upstream):
+    with pytest.raises(httpx.HTTPStatusError):
+        cache.open("https://storage.example.com/missing.pdf")
+    assert cache.stats()["filling"] == 0
+
+
+@pytest.mark.parametrize("name,fallback", [
+    ("Report — 2024 Ñairobi.pdf", "Report 2024 Nairobi.pdf"),
+    ('evil"\r\nX-Injected: 1.pdf', "evilX-Injected: 1.pdf"),
+    ("年报.pdf", "download.pdf"),
+])
+def test_content_disposition_is_header_safe(name, fallback):
+    header = content_disposition(name)
+    header.encode("latin-1")
+    assert "\r" not in header and "\n" not in header
+    assert f'filename="{fallback}"' in header
+    assert "filename*=UTF-8''" in header
@@ -0,0 +1,126 @@
+import threading
+from datetime import datetime, timedelta
+from database.models import Document, Job
+from utils import job_queue
+from utils.job_queue import EMBED_DOCUMENT, SUMMARIZE_CHAT
+
+
+def add_documents(db, count):
+    for i in range(count):
+        db.add(Document(id=f"doc-{i:02d}", name=f"Report {i}", year=2020, file_url="https://example.com/r.pdf"))
+    db.commit()
+
+
+def expire_leases(db):
+    db.query(Job).update({"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_enqueue_dedupes_queued_work(db):
+    add_documents(db, 1)
+    assert job_queue.enqueue(db, EMBED_DOCUMENT, "doc-00")
+    assert job_queue.enqueue(db, EMBED_DOCUMENT, "doc-00") is None
+    # Per-user jobs are deduplicated per user
+    assert job_queue.enqueue(db, SUMMARIZE_CHAT, "doc-00", user_id="a")
+    assert job_queue.enqueue(db, SUMMARIZE_CHAT, "doc-00", user_id="b")
+    assert job_queue.enqueue(db, SUMMARIZE_CHAT, "doc-00", user_id="a") is None
+    db.commit()
+    assert db.query(Job).count() == 3
+
+    # Finished work can be queued again
+    [job] = job_queue.claim(db, "w1", [EMBED_DOCUMENT])
+    job_queue.complete(db, job)
+    db.commit()
+    assert job_queue.enqueue(db, EMBED_DOCUMENT, "doc-00")
+
+
+def test_concurrent_claims_never_share_a_job(db, session_factory):
+    add_documents(db, 30)
+    for i in range(30):
+        job_queue.enqueue(db, EMBED_DOCUMENT, f"doc-{i:02d}")
+    db.commit()
+
+    claimed, errors = [], []
+
+    def worker(name):
+        session = session_factory()
+        try:
+            while True:
+                jobs = job_queue.claim(session, name, [EMBED_DOCUMENT], limit=3)
+                if not jobs:
+                    return
+                claimed.extend((job.id, name) for job in jobs)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    ids = [job_id for job_id, _ in claimed]
+    assert len(ids) == len(set(ids)) == 30
+    owners = dict(claimed)
+    for job in db.query(Job).all():
+        assert (job.status, job.attempts, job.locked_by) == (job_queue.RUNNING, 1, owners[job.id])
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(db, session_factory):
+    add_documents(db, 1)
+    job_queue.enqueue(db, EMBED_DOCUMENT, "doc-00")
+    db.commit()
+    [job] = job_queue.claim(db, "w1", [EMBED_DOCUMENT])
+
+    other = session_factory()
+    assert job_queue.claim(other, "w2", [EMBED_DOCUMENT]) == []
+    expire_leases(db)
+    [reclaimed] = job_queue.claim(other, "w2", [EMBED_DOCUMENT])
+    assert (reclaimed.id, reclaimed.attempts, reclaimed.locked_by) == (job.id, 2, "w2")
+    other.close()
+
+    # The first worker no longer holds the lease
+    assert job_queue.extend_lease(db, "w1", [job.id]) == 0
+    assert job_queue.extend_lease(db, "w2", [job.id]) == 1
+
+
+def test_lease_expired_on_the_final_attempt_fails_the_job(db, monkeypatch):
+    add_documents(db, 1)
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 1)
+    job_queue.enqueue(db, EMBED_DOCUMENT, "doc-00")
+    db.commit()
+    job_queue.claim(db, "w1", [EMBED_DOCUMENT])
+    expire_leases(db)
+
+    assert job_queue.claim(db, "w2", [EMBED_DOCUMENT]) == []
+    job = db.query(Job).one()
+    assert (job.status, job.locked_by) == (job_queue.FAILED, None)
+    assert job.last_error == "Lease expired on the final attempt"
+
+
+def test_failed_job_backs_off_then_fails_for_good(db, monkeypatch):
+    add_documents(db, 1)
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BACKOFF_SECONDS", 60)
+    job_queue.enqueue(db, EMBED_DOCUMENT, "doc-00")
+    db.commit()
+
+    [job] = job_queue.claim(db, "w1", [EMBED_DOCUMENT])
+    job_queue.fail(db, job, "boom")
+    db.commit()
+    assert job.status == job_queue.QUEUED
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=50)
+    # Not due yet
+    assert job_queue.claim(db, "w1", [EMBED_DOCUMENT]) == []
+
+    db.query(Job).update({"run_after": datetime.utcnow()})
+    db.commit()
+    [job] = job_queue.claim(db, "w1", [EMBED_DOCUMENT])
+    job_queue.fail(db, job, "boom again")
+    db.commit()
+    assert (job.status, job.attempts, job.last_error) == (job_queue.FAILED, 2, "boom again")
+    # Out of attempts: the dedupe key stays, so the same work is not queued again
+    assert job_queue.enqueue(db, EMBED_DOCUMENT, "doc-00") is None
@@ -0,0 +1,48 @@
+import pytest
+from utils.metric_intents import classify_metric_question
+
+# Questions that mention a metric's words but do not ask for the stored figure
+NOT_METRIC_QUESTIONS = [
+    "What is the interest rate on loans?",
+    "How do I become a member?",
+    "Who are the board members?",
+    "What was the net income?",
+    "What savings products are offered?",
+    "What is the par value of shares?",
+    "How do I apply for a loan?",
+    "What types of loans are available?",
+    "Which members sit on the credit committee?",
+    "What are the requirements for joining?",
+    "Why did the loan book grow?",
+    "Compare total deposits and total assets",
+    "What interest is charged on emergency loans?",
+    "Explain the dividend policy",
+    "Where are the sacco offices?",
+    "Tell me about member savings",
+    "",
+]
+
+METRIC_QUESTIONS = [
+    ("What is the loan book?", "loan_book_value"),
+    ("What is the loan portfolio value?", "loan_book_value"),
+    ("How many members does the sacco have?", "membership_count"),
+    ("number of members", "membership_count"),
+    ("What are total deposits?", "deposits"),
+    ("What is the asset base?", "asset_base"),
+    ("total assets", "asset_base"),
+    ("What was the dividend rate?", "dividend_rate"),
+    ("What is the interest rebate?", "interest_rebate"),
+    ("What was the total revenue?", "revenue"),
+    ("What is the portfolio at risk?", "portfolio_at_risk"),
+    ("What is the non-performing loans ratio?", "portfolio_at_risk"),
+]
+
+
+@pytest.mark.parametrize("question", NOT_METRIC_QUESTIONS)
+def test_does_not_match_ordinary_questions(question):
+    assert classify_metric_question(question) is None
+
+
+@pytest.mark.parametrize("question,field", METRIC_QUESTIONS)
+def test_matches_explicit_metric_questions(question, field):
+    assert classify_metric_question(question) == field
@@ -0,0 +1,108 @@
+import pytest
+from database.models import Document, SaccoMetric, SaccoMetricRollup
+from schemas.saccoMetricSchema import SaccoMetricBulkUpsert, SaccoMetricCreate
+from controllers.saccoMetricController import upsert_metrics
+from utils.metric_rollups import ALL_YEARS, METRIC_FIELDS, apply_metric, rebuild_rollups
+
+
+def add_documents(db, count):
+    for i in range(count):
+        db.add(Document(id=f"doc-{i}", name=f"Report {i}", year=2020, file_url="https://example.com/r.pdf"))
+    db.commit()
+
+
+def insert_metric(db, **values):
+    # What create_metric and the metrics job do
+    metric = SaccoMetric(**values)
+    db.add(metric)
+    apply_metric(db, metric)
+    db.commit()
+
+
+def recomputed(db):
+    # Rollups computed from scratch, with AVG()'s NULL handling
+    groups = {}
+    for metric in db.query(SaccoMetric).all():
+        for year in (metric.year, ALL_YEARS):
+            groups.setdefault(year, []).append(metric)
+    result = {}
+    for year, metrics in groups.items():
+        entry = {"metric_count": len(metrics)}
+        for field in METRIC_FIELDS:
+            values = [getattr(m, field) for m in metrics if getattr(m, field) is not None]
+            entry[f"sum_{field}"] = pytest.approx(sum(values))
+            entry[f"count_{field}"] = len(values)
+            entry[f"avg_{field}"] = pytest.approx(sum(values) / len(values) if values else 0)
+        result[year] = entry
+    return result
+
+
+def stored(db):
+    db.expire_all()
+    columns = ["metric_count"] + [f"{kind}_{field}" for field in METRIC_FIELDS for kind in ("sum", "count", "avg")]
+    return {
+        rollup.year: {column: getattr(rollup, column) for column in columns}
+        for rollup in db.query(SaccoMetricRollup).all()
+    }
+
+
+def test_rollups_match_recompute_after_mixed_writes(db):
+    add_documents(db, 4)
+    insert_metric(db, document_id="doc-0", year=2020, revenue=100, deposits=50, membership_count=10)
+    insert_metric(db, document_id="doc-1", year=2021, revenue=300, deposits=70, membership_count=30)
+
+    body = SaccoMetricBulkUpsert(items=[
+        # Updates doc-0's 2020 row in place
+        SaccoMetricCreate(document_id="doc-0", year=2020, revenue=120, deposits=10, membership_count=12),
+        SaccoMetricCreate(document_id="doc-2", year=2020, revenue=80, deposits=40),
+        SaccoMetricCreate(document_id="doc-3", year=2022, revenue=500),
+        # Later items win over earlier ones for the same document and year
+        SaccoMetricCreate(document_id="doc-3", year=2022, revenue=550, asset_base=9000),
+    ])
+    result = upsert_metrics(body, db)
+    assert result["upserted"] == 3
+    assert result["years"] == [2020, 2022]
+
+    insert_metric(db, document_id="doc-1", year=2022, revenue=450, deposits=90)
+
+    assert stored(db) == recomputed(db)
+    assert stored(db)[2020]["avg_deposits"] == pytest.approx(25)
+    assert stored(db)[2022]["avg_revenue"] == pytest.approx(500)
+
+
+def test_null_metrics_are_left_out_of_averages(db):
+    add_documents(db, 2)
+    insert_metric(db, document_id="doc-0", year=2020, revenue=100)
+    insert_metric(db, document_id="doc-1", year=2020, revenue=300)
+
+    db.query(SaccoMetric).filter(SaccoMetric.document_id == "doc-1").update({"revenue": None})
+    rebuild_rollups(db, [2020])
+    db.commit()
+
+    rollup = stored(db)[2020]
+    assert (rollup["count_revenue"], rollup["avg_revenue"]) == (1, pytest.approx(100))
+    assert stored(db) == recomputed(db)
+
+
+def test_full_rebuild_matches_incremental_rollups(db):
+    add_documents(db, 3)
+    for i in range(3):
+        insert_metric(db, document_id=f"doc-{i}", year=2020 + i % 2, revenue=10 * (i + 1), portfolio_at_risk=i)
+    incremental = stored(db)
+
+    rebuild_rollups(db)
+    db.commit()
+    assert stored(db) == incremental == recomputed(db)
+
+
+def test_rebuild_drops_years_without_metrics(db):
+    add_documents(db, 2)
+    insert_metric(db, document_id="doc-0", year=2020, revenue=10)
+    insert_metric(db, document_id="doc-1", year=2021, revenue=20)
+
+    db.query(SaccoMetric).filter(SaccoMetric.year == 2021).delete()
+    rebuild_rollups(db, [2021])
+    db.commit()
+
+    assert set(stored(db)) == {2020, ALL_YEARS}
+    assert stored(db) == recomputed(db)
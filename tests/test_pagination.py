@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from database.models import Chat, Document, SaccoMetric
+from controllers.chatController import get_chat_history
+from controllers.documentController import list_documents
+from controllers.saccoMetricController import list_metrics
+from utils.pagination import decode_cursor, encode_cursor
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def rows(db):
+    # Few distinct sort keys, so most page boundaries fall inside a run of ties
+    for i in range(23):
+        db.add(Document(
+            id=f"doc-{i:02d}", name=f"Report {i}", year=2020 + i % 2,
+            file_url="https://example.com/r.pdf", created_at=START + timedelta(seconds=i % 4),
+        ))
+        db.add(SaccoMetric(id=f"metric-{i:02d}", document_id=f"doc-{i:02d}", year=2020 + i % 3))
+        db.add(Chat(
+            id=f"chat-{i:02d}", user_id="user", document_id="doc-00", sender="user",
+            message=f"message {i}", timestamp=START + timedelta(seconds=i % 3), sequence=i % 2,
+        ))
+    db.commit()
+
+
+def page_through(fetch, key, limit=5):
+    seen, cursor = [], None
+    while True:
+        page = fetch(cursor, limit)
+        seen.extend(key(page))
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return seen
+
+
+def test_document_pages_return_each_row_once(db, rows):
+    seen = page_through(
+        lambda cursor, limit: list_documents(db, year=None, status=None, uploaded_by=None,
+                                             cursor=cursor, limit=limit, current_user=None),
+        lambda page: [item["id"] for item in page["items"]],
+    )
+    assert sorted(seen) == [f"doc-{i:02d}" for i in range(23)]
+
+
+def test_metric_pages_return_each_row_once(db, rows):
+    seen = page_through(
+        lambda cursor, limit: list_metrics(db, year=None, document_id=None, cursor=cursor, limit=limit),
+        lambda page: [item["id"] for item in page["items"]],
+    )
+    assert sorted(seen) == [f"metric-{i:02d}" for i in range(23)]
+
+
+def test_chat_history_pages_return_each_row_once(db, rows):
+    seen = page_through(
+        lambda cursor, limit: get_chat_history("doc-00", "user", before=cursor, limit=limit, db=db),
+        lambda page: [message["text"] for message in page["messages"]],
+    )
+    assert sorted(seen) == sorted(f"message {i}" for i in range(23))
+
+
+def test_cursor_round_trips_its_types():
+    cursor = encode_cursor(START, 7, "chat-01")
+    assert decode_cursor(cursor, (datetime, int, str)) == [START, 7, "chat-01"]
+
+
+@pytest.mark.parametrize("values", [
+    (START, "chat-01"),              # wrong size
+    ("2026-01-01", 7, "chat-01"),    # datetime sent as a plain string
+    (START, "7", "chat-01"),         # int sent as a string
+    (START, True, "chat-01"),        # bool is not an int key
+    (START, 7, 12),                  # id sent as a number
+    (START, 7, None),
+])
+def test_mistyped_cursor_is_rejected(values):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(encode_cursor(*values), (datetime, int, str))
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", encode_cursor()[:-1] + "x"])
+def test_garbled_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor, (int, str))
+    assert excinfo.value.status_code == 400
+
+
+def test_mistyped_cursor_is_rejected_by_the_listing(db, rows):
+    with pytest.raises(HTTPException) as excinfo:
+        list_metrics(db, year=None, document_id=None, cursor=encode_cursor("2020", "metric-01"), limit=5)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,77 @@
+import os
+import time
+import pytest
+from utils import pdf_utils
+from utils.pdf_utils import PageCache, extract_pages
+from tests.pdf_factory import make_pdf
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PageCache(str(tmp_path / "pages"))
+    monkeypatch.setattr(pdf_utils, "page_cache", cache)
+    return cache
+
+
+def pdf(label, pages=3):
+    return make_pdf([f"{label} page {n}" for n in range(1, pages + 1)])
+
+
+def test_pages_come_back_in_order_and_from_cache(cache):
+    data = pdf("Annual report", pages=5)
+    cold = list(extract_pages(data))
+    assert [n for n, _ in cold] == [1, 2, 3, 4, 5]
+    assert "Annual report page 4" in cold[3][1]
+
+    # A warm run reads the stored text without touching the PDF
+    assert list(extract_pages(data)) == cold
+
+
+def test_cache_is_bounded_by_least_recently_used_document(cache):
+    def used():
+        return sum(f.stat().st_size for d in os.scandir(cache.directory) for f in os.scandir(d.path))
+
+    # Directory mtimes order the documents; keep them apart on coarse clocks
+    list(extract_pages(pdf("first")))
+    per_document = used()
+    time.sleep(0.05)
+    list(extract_pages(pdf("other")))
+    time.sleep(0.05)
+    list(extract_pages(pdf("first")))  # first is now the most recently used
+    time.sleep(0.05)
+    cache.max_bytes = 2 * per_document
+    list(extract_pages(pdf("third")))
+
+    texts = {name: open(os.path.join(cache.directory, name, "1.txt")).read() for name in os.listdir(cache.directory)}
+    assert len(texts) == 2
+    assert any("first" in text for text in texts.values())
+    assert any("third" in text for text in texts.values())
+    assert cache.evictions == 1
+
+
+def test_documents_in_use_are_not_evicted(cache):
+    data = pdf("in use")
+    pages = extract_pages(data)
+    next(pages)  # Mid-read: this document is held
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert len(os.listdir(cache.directory)) == 1
+    assert [n for n, _ in pages] == [2, 3]
+
+    cache.evict()
+    assert os.listdir(cache.directory) == []
+
+
+def test_uncached_extraction_leaves_no_scratch_directory(cache, tmp_path, monkeypatch):
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(pdf_utils.tempfile, "tempdir", str(scratch))
+
+    assert len(list(extract_pages(pdf("uncached"), use_cache=False))) == 3
+    pages = extract_pages(pdf("abandoned"), use_cache=False)
+    next(pages)
+    pages.close()
+
+    assert os.listdir(scratch) == []
+    assert not os.path.exists(cache.directory)
@@ -0,0 +1,52 @@
+import pytest
+from utils.embeddings import HashEmbeddingProvider
+from utils.vector_store import ChromaVectorStore, NumpyVectorStore
+
+embedder = HashEmbeddingProvider(dimensions=64)
+
+
+def make_store(kind, tmp_path):
+    if kind == "numpy":
+        return NumpyVectorStore(directory=str(tmp_path / "vectors"), collection="tests")
+    return ChromaVectorStore(path=str(tmp_path / "chroma"), collection="tests", partition=kind.split("-")[1])
+
+
+STORES = ["numpy", "chroma-none", "chroma-document", "chroma-year"]
+
+
+def add(store, document_id, texts):
+    store.add(document_id, texts, embedder.embed(texts), [{"page_start": 1} for _ in texts], year=2023)
+
+
+@pytest.mark.parametrize("kind", STORES)
+def test_add_replaces_the_documents_chunks(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    add(store, "doc-a", ["old loans text", "old deposits text", "old members text"])
+    # A retried or re-ingested document with fewer, different chunks
+    add(store, "doc-a", ["new loans text", "new deposits text"])
+
+    results = store.query("doc-a", embedder.embed(["loans"])[0], top_k=10, year=2023)
+    assert sorted(results) == ["new deposits text", "new loans text"]
+
+
+@pytest.mark.parametrize("kind", STORES)
+def test_retried_add_leaves_one_copy(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    texts = ["loan book grew", "deposits fell"]
+    add(store, "doc-a", texts)
+    add(store, "doc-a", texts)
+
+    assert sorted(store.query("doc-a", embedder.embed(["loan"])[0], top_k=10, year=2023)) == sorted(texts)
+
+
+@pytest.mark.parametrize("kind", STORES)
+def test_queries_and_deletes_are_scoped_to_the_document(kind, tmp_path):
+    store = make_store(kind, tmp_path)
+    add(store, "doc-a", ["alpha loans"])
+    add(store, "doc-b", ["beta loans"])
+
+    assert store.query("doc-a", embedder.embed(["loans"])[0], top_k=10, year=2023) == ["alpha loans"]
+    store.delete_document("doc-a", year=2023)
+    assert store.query("doc-a", embedder.embed(["loans"])[0], top_k=10, year=2023) == []
+    assert store.query("doc-b", embedder.embed(["loans"])[0], top_k=10, year=2023) == ["beta loans"]
+    assert store.query("missing", embedder.embed(["loans"])[0], top_k=10, year=2023) == []
@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Hashable, Optional, Sequence
+
+ANSWER_CACHE_ENABLED = (os.getenv("ANSWER_CACHE_ENABLED") or "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD") or 0.95)
+ANSWER_CACHE_MAX_PER_DOCUMENT = int(os.getenv("ANSWER_CACHE_MAX_PER_DOCUMENT") or 200)
+ANSWER_CACHE_MAX_DOCUMENTS = int(os.getenv("ANSWER_CACHE_MAX_DOCUMENTS") or 500)
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL") or 24 * 3600)
+
+
+class _DocumentAnswers:
+    def __init__(self, version: Hashable, dimensions: int):
+        self.version = version
+        self.vectors = np.empty((0, dimensions), dtype=np.float32)
+        self.queries = []
+        self.answers = []
+        self.created = []
+        self.last_used = []
+
+    def drop(self, index: int):
+        self.vectors = np.delete(self.vectors, index, axis=0)
+        for column in (self.queries, self.answers, self.created, self.last_used):
+            del column[index]
+
+
+class AnswerCache:
+    """Answers keyed by query embedding, one bucket per document.
+
+    A lookup returns the stored answer of the most similar cached query when its
+    cosine similarity clears the threshold. Each bucket carries the document's
+    version (its updated_at), so re-embedding a document drops its answers.
+    Buckets and entries are both evicted least recently used first.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 max_per_document: int = ANSWER_CACHE_MAX_PER_DOCUMENT,
+                 max_documents: int = ANSWER_CACHE_MAX_DOCUMENTS, ttl: Optional[float] = ANSWER_CACHE_TTL):
+        self.threshold = threshold
+        self.max_per_document = max_per_document
+        self.max_documents = max_documents
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _bucket(self, document_id: str, version: Hashable) -> Optional[_DocumentAnswers]:
+        bucket = self._documents.get(document_id)
+        if bucket is not None and bucket.version != version:
+            del self._documents[document_id]
+            self.invalidations += 1
+            return None
+        return bucket
+
+    def get(self, document_id: str, version: Hashable, embedding: Sequence[float]) -> Optional[str]:
+        query = self._unit(embedding)
+        with self._lock:
+            bucket = self._bucket(document_id, version)
+            if bucket is None or not bucket.answers or bucket.vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            self._documents.move_to_end(document_id)
+            scores = bucket.vectors @ query
+            best = int(np.argmax(scores))
+            now = time.time()
+            if self.ttl and now - bucket.created[best] > self.ttl:
+                bucket.drop(best)
+                self.misses += 1
+                return None
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            bucket.last_used[best] = now
+            self.hits += 1
+            return bucket.answers[best]
+
+    def put(self, document_id: str, version: Hashable, embedding: Sequence[float], query: str, answer: str):
+        vector = self._unit(embedding)
+        now = time.time()
+        with self._lock:
+            bucket = self._bucket(document_id, version)
+            if bucket is None or bucket.vectors.shape[1] != vector.shape[0]:
+                bucket = _DocumentAnswers(version, vector.shape[0])
+                self._documents[document_id] = bucket
+            self._documents.move_to_end(document_id)
+
+            if len(bucket.answers) >= self.max_per_document:
+                bucket.drop(int(np.argmin(bucket.last_used)))
+                self.evictions += 1
+            bucket.vectors = np.vstack([bucket.vectors, vector])
+            bucket.queries.append(query)
+            bucket.answers.append(answer)
+            bucket.created.append(now)
+            bucket.last_used.append(now)
+
+            while len(self._documents) > self.max_documents:
+                _, dropped = self._documents.popitem(last=False)
+                self.evictions += len(dropped.answers)
+
+    def skip(self):
+        # The question came with chat history, so a shared answer could not apply
+        with self._lock:
+            self.skipped += 1
+
+    def invalidate(self, document_id: str):
+        with self._lock:
+            if self._documents.pop(document_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "documents": len(self._documents),
+                "entries": sum(len(bucket.answers) for bucket in self._documents.values()),
+                "threshold": self.threshold,
+            }
+
+
+answer_cache = AnswerCache()
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry.
+
+    When persist_path is set, entries are written to that JSON file by save()
+    and loaded back on construction; keys and values must then be JSON types.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, persist_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        if persist_path:
+            self._load()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "maxSize": self.maxsize,
+        }
+
+    def save(self):
+        if not self.persist_path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, value, expires_at]
+                for key, (value, expires_at) in self._data.items()
+                if expires_at is None or expires_at > now
+            ]
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.persist_path)
+
+    def _load(self):
+        try:
+            with open(self.persist_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, value, expires_at in entries[-self.maxsize:]:
+            if expires_at is None or expires_at > now:
+                self._data[key] = (value, expires_at)
@@ -0,0 +1,177 @@
+import os
+from typing import List
+from dotenv import load_dotenv
+from openai import OpenAI
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database.database import SessionLocal
+from database.models import Chat, ChatSummary
+from utils import job_queue
+from utils.tokenizer import count_tokens
+
+load_dotenv()
+# Summaries are written by the job worker, off the request path
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Tokens the summary plus verbatim turns may take up in the prompt
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET") or 1500)
+# Turns folded into the summary per summarization call
+CHAT_SUMMARY_BATCH_TURNS = int(os.getenv("CHAT_SUMMARY_BATCH_TURNS") or 60)
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS") or 300)
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL") or "gpt-3.5-turbo"
+
+
+def after_mark(summary):
+    if summary.summarized_until_id is None:
+        return Chat.timestamp > summary.summarized_until
+    timestamp, sequence = summary.summarized_until, summary.summarized_until_sequence
+    return or_(
+        Chat.timestamp > timestamp,
+        and_(Chat.timestamp == timestamp, Chat.sequence > sequence),
+        and_(Chat.timestamp == timestamp, Chat.sequence == sequence, Chat.id > summary.summarized_until_id)
+    )
+
+
+def load_unsummarized(db: Session, document_id: str, user_id: str):
+    summary = db.query(
+        ChatSummary.summary, ChatSummary.summarized_until,
+        ChatSummary.summarized_until_sequence, ChatSummary.summarized_until_id
+    ).filter(
+        ChatSummary.document_id == document_id,
+        ChatSummary.user_id == user_id
+    ).first()
+
+    query = db.query(Chat.id, Chat.sender, Chat.message, Chat.timestamp, Chat.sequence).filter(
+        Chat.document_id == document_id,
+        Chat.user_id == user_id
+    )
+    if summary:
+        query = query.filter(after_mark(summary))
+
+    # Everything after the mark, oldest first; the mark trails the conversation by
+    # about half the token budget, so this stays small once a summary exists
+    rows = query.order_by(Chat.timestamp, Chat.sequence, Chat.id).all()
+    return (summary.summary if summary else None), rows
+
+
+def _find_summary(db: Session, document_id: str, user_id: str):
+    return db.query(ChatSummary).filter(
+        ChatSummary.document_id == document_id,
+        ChatSummary.user_id == user_id
+    ).first()
+
+
+def save_summary(db: Session, document_id: str, user_id: str, summary: str, last_row):
+    values = {
+        "summary": summary,
+        "summarized_until": last_row.timestamp,
+        "summarized_until_sequence": last_row.sequence,
+        "summarized_until_id": last_row.id,
+    }
+    existing = _find_summary(db, document_id, user_id)
+    if not existing:
+        try:
+            with db.begin_nested():
+                db.add(ChatSummary(document_id=document_id, user_id=user_id, **values))
+            db.commit()
+            return
+        except IntegrityError:
+            # Another writer created the row first; update theirs
+            existing = _find_summary(db, document_id, user_id)
+    for key, value in values.items():
+        setattr(existing, key, value)
+    db.commit()
+
+
+def split_turns(rows, budget: int):
+    # Walk back from the newest turn and keep as many as fit in the budget
+    kept_tokens = 0
+    split = len(rows)
+    while split > 0:
+        tokens = count_tokens(rows[split - 1].message)
+        if kept_tokens + tokens > budget:
+            break
+        kept_tokens += tokens
+        split -= 1
+
+    # Never keep a reply verbatim while folding away the question it answers
+    while 0 < split < len(rows) and rows[split].sender == 'assistant':
+        split += 1
+    return rows[:split], rows[split:]
+
+
+def summarize(previous: str, turns) -> str:
+    transcript = "\n".join(f"{turn.sender}: {turn.message}" for turn in turns)
+    prompt = (
+        "Update the running summary of a conversation about a SACCO financial report. "
+        "Keep figures, years and open questions; drop pleasantries.\n\n"
+        f"Current summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"
+    )
+    response = client.chat.completions.create(
+        model=CHAT_SUMMARY_MODEL,
+        temperature=0,
+        max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+        messages=[
+            {"role": "system", "content": "You write concise conversation summaries."},
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return response.choices[0].message.content.strip()
+
+
+def fold_history(db: Session, document_id: str, user_id: str) -> int:
+    # Run by the worker for summarize_chat jobs. Folds the turns after the mark into
+    # the summary until the rest fits in half the budget, so it is not rewritten on
+    # every turn. Returns the number of turns folded.
+    summary, rows = load_unsummarized(db, document_id, user_id)
+    budget = CHAT_HISTORY_TOKEN_BUDGET - (count_tokens(summary) if summary else 0)
+    if sum(count_tokens(row.message) for row in rows) <= budget:
+        return 0
+
+    older, _ = split_turns(rows, max(budget // 2, 0))
+    # Fold from the mark forward in batches, saving the mark after each one so a
+    # long backlog is never skipped and a failed call loses at most one batch
+    for start in range(0, len(older), CHAT_SUMMARY_BATCH_TURNS):
+        batch = older[start:start + CHAT_SUMMARY_BATCH_TURNS]
+        summary = summarize(summary, batch)
+        save_summary(db, document_id, user_id, summary, batch[-1])
+    return len(older)
+
+
+def request_summary(db: Session, document_id: str, user_id: str):
+    # At most one summarize_chat job per conversation is queued or running
+    job_queue.enqueue(db, job_queue.SUMMARIZE_CHAT, document_id, user_id=user_id)
+    db.commit()
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def build_history(document_id: str, user_id: str) -> List[dict]:
+    summary, rows = await run_in_threadpool(_with_session, load_unsummarized, document_id, user_id)
+
+    budget = CHAT_HISTORY_TOKEN_BUDGET - (count_tokens(summary) if summary else 0)
+    if sum(count_tokens(row.message) for row in rows) > budget:
+        # Never waits on the LLM: send the newest turns that fit and let the worker
+        # fold the rest into the summary; until it has, those turns are left out
+        _, rows = split_turns(rows, max(budget, 0))
+        await run_in_threadpool(_with_session, request_summary, document_id, user_id)
+
+    messages = []
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    return messages + [{"role": row.sender, "content": row.message} for row in rows]
+
+
+def delete_summary(db: Session, document_id: str, user_id: str):
+    db.query(ChatSummary).filter(
+        ChatSummary.document_id == document_id,
+        ChatSummary.user_id == user_id
+    ).delete()
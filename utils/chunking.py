@@ -0,0 +1,54 @@
+from typing import Iterable, Iterator, Tuple, TypedDict
+from utils.tokenizer import get_encoder
+
+
+class Chunk(TypedDict):
+    text: str
+    page_start: int
+    page_end: int
+    token_count: int
+
+
+def iter_chunks(
+    pages: Iterable[Tuple[int, str]],
+    chunk_size: int = 300,
+    overlap: int = 50,
+    encoding: str = "cl100k_base",
+) -> Iterator[Chunk]:
+    # Consumes (page_number, text) pairs and yields overlapping token windows.
+    # Only the current window plus one page of tokens is held at a time.
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+
+    enc = get_encoder(encoding)
+    step = chunk_size - overlap
+    tokens, token_pages = [], []
+
+    def window(size):
+        return Chunk(
+            text=enc.decode(tokens[:size]),
+            page_start=token_pages[0],
+            page_end=token_pages[size - 1],
+            token_count=size,
+        )
+
+    first = True
+    emitted = False
+    for page_number, text in pages:
+        if not text:
+            continue
+        # Pages are joined with a newline, as the whole-document text used to be
+        page_tokens = enc.encode(text if first else "\n" + text)
+        first = False
+        tokens.extend(page_tokens)
+        token_pages.extend([page_number] * len(page_tokens))
+
+        while len(tokens) >= chunk_size:
+            yield window(chunk_size)
+            emitted = True
+            del tokens[:step]
+            del token_pages[:step]
+
+    # After the first window, the leading `overlap` tokens were already emitted
+    if len(tokens) > (overlap if emitted else 0):
+        yield window(len(tokens))
@@ -0,0 +1,90 @@
+import os
+import asyncio
+from typing import Dict, Iterable
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database.database import SessionLocal
+from database.models import Document, Job
+from utils import job_queue
+
+DOCUMENT_STATUS_POLL_SECONDS = float(os.getenv("DOCUMENT_STATUS_POLL_SECONDS") or 2)
+
+# Document.status: 1 uploaded, 2 embedded (chat-ready), 3 metrics extracted
+STATES = {1: "ingesting", 2: "extracting_metrics", 3: "ready"}
+FINAL_STATES = {"ready", "failed", "not_found"}
+
+
+def load_statuses(db: Session, document_ids: Iterable[str]) -> Dict[str, dict]:
+    ids = list(document_ids)
+    docs = db.query(Document.id, Document.status).filter(Document.id.in_(ids)).all()
+    failed = dict(db.query(Job.document_id, Job.last_error).filter(
+        Job.document_id.in_(ids),
+        Job.kind.in_((job_queue.EMBED_DOCUMENT, job_queue.EXTRACT_METRICS)),
+        Job.status == job_queue.FAILED,
+        Job.dedupe_key.isnot(None),
+    ).all())
+
+    statuses = {document_id: {"id": document_id, "status": None, "state": "not_found"} for document_id in ids}
+    for doc in docs:
+        entry = {"id": doc.id, "status": doc.status, "state": STATES.get(doc.status, "unknown")}
+        if doc.status != 3 and doc.id in failed:
+            entry.update(state="failed", error=failed[doc.id])
+        statuses[doc.id] = entry
+    return statuses
+
+
+def _load_statuses(document_ids):
+    db = SessionLocal()
+    try:
+        return load_statuses(db, document_ids)
+    finally:
+        db.close()
+
+
+class DocumentStatusFeed:
+    # One poller per process serves every open status stream, so the database
+    # sees a single query per tick no matter how many clients are watching
+
+    def __init__(self, interval: float = DOCUMENT_STATUS_POLL_SECONDS):
+        self.interval = interval
+        # Each subscriber's inbox maps to the last entry it was sent per document
+        self._subscribers: Dict[asyncio.Queue, Dict[str, dict]] = {}
+        self._task = None
+
+    async def subscribe(self, document_ids: Iterable[str]) -> asyncio.Queue:
+        snapshot = await run_in_threadpool(_load_statuses, set(document_ids))
+        inbox = asyncio.Queue()
+        for entry in snapshot.values():
+            inbox.put_nowait(entry)
+        self._subscribers[inbox] = snapshot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+        return inbox
+
+    def unsubscribe(self, inbox: asyncio.Queue):
+        self._subscribers.pop(inbox, None)
+
+    async def _poll(self):
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            watched = set()
+            for sent in self._subscribers.values():
+                watched.update(sent)
+            if not watched:
+                continue
+            try:
+                statuses = await run_in_threadpool(_load_statuses, watched)
+            except Exception as e:
+                print(f"Document status poll failed: {e}")
+                continue
+
+            for inbox, sent in list(self._subscribers.items()):
+                for document_id, entry in sent.items():
+                    # Subscribers that joined mid-poll are picked up on the next tick
+                    latest = statuses.get(document_id)
+                    if latest is not None and latest != entry:
+                        sent[document_id] = latest
+                        inbox.put_nowait(latest)
+
+
+status_feed = DocumentStatusFeed()
@@ -0,0 +1,157 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import List, Optional, Sequence
+
+# SQLite caps bound parameters per statement, so look digests up in slices
+_LOOKUP_SLICE = 500
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by (model, sha256 of the text).
+
+    Vectors are stored as float32 blobs. When the stored vectors grow past
+    max_bytes, the least recently used entries are evicted. The stored size is
+    kept as a running total, so inserts do not scan the table; other processes
+    sharing the file are only seen when the total is re-read before evicting.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, digest))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._total = self._stored_bytes()
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        digests = [self.digest(text) for text in texts]
+        found = {}
+
+        with self._lock:
+            unique = list(dict.fromkeys(digests))
+            for start in range(0, len(unique), _LOOKUP_SLICE):
+                part = unique[start:start + _LOOKUP_SLICE]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT digest, vector FROM embeddings WHERE model = ? AND digest IN ({placeholders})",
+                    [model, *part],
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND digest = ?",
+                    [(now, model, digest) for digest in found],
+                )
+                self._conn.commit()
+
+            results = []
+            for digest in digests:
+                blob = found.get(digest)
+                if blob is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    results.append(vector.tolist())
+            return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        now = time.time()
+        # Keyed by digest: a repeated text keeps its last vector, as INSERT OR REPLACE would
+        rows = {}
+        for text, vector in zip(texts, vectors):
+            blob = array("f", vector).tobytes()
+            digest = self.digest(text)
+            rows[digest] = (model, digest, blob, len(blob), now)
+
+        with self._lock:
+            replaced = self._stored_bytes(model, list(rows))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, digest, vector, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows.values(),
+            )
+            self._conn.commit()
+            self._total += sum(row[3] for row in rows.values()) - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _stored_bytes(self, model: Optional[str] = None, digests: Sequence[str] = ()) -> int:
+        # The whole table without a model; otherwise the given entries, by primary key
+        if model is None:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        total = 0
+        for start in range(0, len(digests), _LOOKUP_SLICE):
+            part = digests[start:start + _LOOKUP_SLICE]
+            placeholders = ",".join("?" * len(part))
+            total += self._conn.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE model = ? AND digest IN ({placeholders})",
+                [model, *part],
+            ).fetchone()[0]
+        return total
+
+    def _evict(self):
+        # Other processes may have inserted or evicted since the total was last read
+        self._total = self._stored_bytes()
+        if self._total <= self.max_bytes:
+            return
+
+        # Trim to 90% so a full cache does not evict on every single insert
+        excess = self._total - int(self.max_bytes * 0.9)
+        removed = []
+        for model, digest, size in self._conn.execute(
+            "SELECT model, digest, size FROM embeddings ORDER BY last_used"
+        ):
+            if excess <= 0:
+                break
+            removed.append((model, digest))
+            excess -= size
+            self._total -= size
+
+        self._conn.executemany("DELETE FROM embeddings WHERE model = ? AND digest = ?", removed)
+        self._conn.commit()
+        self.evictions += len(removed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            size = self._total
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "maxBytes": self.max_bytes,
+        }
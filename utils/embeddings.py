@@ -0,0 +1,246 @@
+import os
+import re
+import time
+import atexit
+import random
+import asyncio
+import hashlib
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+from utils.cache import TTLCache
+from utils.embedding_cache import EmbeddingCache
+from utils.tokenizer import count_tokens
+
+load_dotenv()
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER") or "openai"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL") or "text-embedding-ada-002"
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL") or "sentence-transformers/all-MiniLM-L6-v2"
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE") or 64)
+# Set to "hash" to run the local provider without sentence-transformers installed
+LOCAL_EMBEDDING_FALLBACK = os.getenv("LOCAL_EMBEDDING_FALLBACK") or "none"
+HASH_EMBEDDING_DIMENSIONS = int(os.getenv("HASH_EMBEDDING_DIMENSIONS") or 384)
+
+# ada-002 accepts at most 2048 inputs and 8191 tokens per input; keeping batches
+# well under the per-request token limit lets large reports fan out concurrently
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS") or 20000)
+EMBED_BATCH_MAX_INPUTS = int(os.getenv("EMBED_BATCH_MAX_INPUTS") or 2048)
+EMBED_BATCH_CONCURRENCY = int(os.getenv("EMBED_BATCH_CONCURRENCY") or 4)
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES") or 5)
+EMBED_BACKOFF_SECONDS = float(os.getenv("EMBED_BACKOFF_SECONDS") or 1)
+
+_RETRYABLE = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+embedding_cache = EmbeddingCache(
+    path=os.getenv("EMBEDDING_CACHE_PATH") or ".cache/embeddings.sqlite3",
+    max_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_MB") or 512) * 1024 * 1024,
+)
+
+
+def batch_by_tokens(token_counts: Sequence[int], max_tokens: int = EMBED_BATCH_TOKENS,
+                    max_inputs: int = EMBED_BATCH_MAX_INPUTS) -> List[List[int]]:
+    batches, current, current_tokens = [], [], 0
+    for index, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingProvider:
+    # `name` namespaces cached vectors and the vector collection, so vectors from
+    # different providers are never mixed; implement embed() to plug in another
+    name = None
+    # embed_texts() runs this many token-sized batches at once
+    concurrency = 1
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    concurrency = EMBED_BATCH_CONCURRENCY
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.model = model
+        self.name = model
+
+    def embed(self, texts):
+        for attempt in range(EMBED_MAX_RETRIES + 1):
+            try:
+                response = client.embeddings.create(model=self.model, input=texts)
+                return [e.embedding for e in response.data]
+            except _RETRYABLE as e:
+                if attempt == EMBED_MAX_RETRIES:
+                    raise
+                delay = EMBED_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"Embedding batch failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    async def aembed(self, texts):
+        for attempt in range(EMBED_MAX_RETRIES + 1):
+            try:
+                response = await async_client.embeddings.create(model=self.model, input=texts)
+                return [e.embedding for e in response.data]
+            except _RETRYABLE as e:
+                if attempt == EMBED_MAX_RETRIES:
+                    raise
+                delay = EMBED_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"Embedding request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    # Deterministic feature-hashing vectors: no model, no network, identical in every
+    # process. Good enough for keyword-level retrieval in tests and offline runs.
+    _words = re.compile(r"\w+")
+
+    def __init__(self, dimensions: int = HASH_EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hash-{dimensions}"
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in self._words.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed(self, texts):
+        return [self._vector(text) for text in texts]
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    # In-process CPU inference with sentence-transformers (pip install sentence-transformers).
+    # Without it, startup fails unless LOCAL_EMBEDDING_FALLBACK=hash asks for hashing instead.
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL, batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+                 fallback: str = LOCAL_EMBEDDING_FALLBACK):
+        self.batch_size = batch_size
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            if fallback != "hash":
+                raise RuntimeError(
+                    "EMBEDDING_PROVIDER=local needs sentence-transformers; install it "
+                    "or set LOCAL_EMBEDDING_FALLBACK=hash to use hash embeddings"
+                )
+            print("sentence-transformers is not installed; using hash embeddings")
+            self._fallback = HashEmbeddingProvider()
+            self.name = self._fallback.name
+            return
+        self._fallback = None
+        self._model = SentenceTransformer(model, device="cpu")
+        self.name = f"local-{model.rsplit('/', 1)[-1]}"
+        # The model is not safe to call from several threads at once
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        if self._fallback:
+            return self._fallback.embed(texts)
+        with self._lock:
+            vectors = self._model.encode(
+                list(texts), batch_size=self.batch_size,
+                normalize_embeddings=True, convert_to_numpy=True,
+            )
+        return vectors.tolist()
+
+
+PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalEmbeddingProvider,
+    "hash": HashEmbeddingProvider,
+}
+
+
+def register_provider(name: str, provider_cls):
+    PROVIDERS[name] = provider_cls
+
+
+def create_provider(name: str, **options) -> EmbeddingProvider:
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{name}'. Available: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name](**options)
+
+
+provider = create_provider(EMBEDDING_PROVIDER)
+
+# Existing OpenAI vectors stay in the original collection; other providers get their own
+EMBEDDING_COLLECTION = "sacco_docs" if provider.name == "text-embedding-ada-002" else f"sacco_docs_{provider.name}"
+
+
+def embed_texts(texts: Sequence[str], token_counts: Optional[Sequence[int]] = None) -> List[List[float]]:
+    embeddings = embedding_cache.get_many(provider.name, texts)
+
+    # Identical chunks (page headers, boilerplate) only need to be sent once
+    pending = {}
+    for index, vector in enumerate(embeddings):
+        if vector is None:
+            pending.setdefault(texts[index], []).append(index)
+    if not pending:
+        return embeddings
+
+    unique_texts = list(pending)
+    if token_counts is None:
+        counts = [count_tokens(text) for text in unique_texts]
+    else:
+        counts = [token_counts[pending[text][0]] for text in unique_texts]
+
+    batches = [[unique_texts[i] for i in batch] for batch in batch_by_tokens(counts)]
+    with ThreadPoolExecutor(max_workers=max(1, min(provider.concurrency, len(batches)))) as pool:
+        results = list(pool.map(provider.embed, batches))
+
+    for batch, vectors in zip(batches, results):
+        embedding_cache.put_many(provider.name, batch, vectors)
+        for text, vector in zip(batch, vectors):
+            for index in pending[text]:
+                embeddings[index] = vector
+
+    return embeddings
+
+
+# Chat queries repeat a lot, so their embeddings are kept in memory (and
+# optionally on disk) keyed by model and normalized text
+query_embedding_cache = TTLCache(
+    maxsize=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE") or 5000),
+    ttl=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL") or 7 * 24 * 3600),
+    persist_path=os.getenv("QUERY_EMBEDDING_CACHE_PATH") or None,
+)
+if query_embedding_cache.persist_path:
+    atexit.register(query_embedding_cache.save)
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def embed_query(text: str) -> List[float]:
+    key = f"{provider.name}:{normalize_query(text)}"
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = provider.embed([text])[0]
+        query_embedding_cache.set(key, embedding)
+    return embedding
+
+
+async def aembed_query(text: str) -> List[float]:
+    key = f"{provider.name}:{normalize_query(text)}"
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = (await provider.aembed([text]))[0]
+        query_embedding_cache.set(key, embedding)
+    return embedding
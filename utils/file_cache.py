@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import ExitStack
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+from utils import http_client
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UpstreamFile:
+    """A remote file streamed straight from upstream, optionally written into the cache.
+
+    The upstream request is made on construction, so errors surface before any
+    response has started. Iterate to read the body in CHUNK_SIZE pieces. When
+    filling the cache, the entry is published only once the body is complete;
+    a reader that goes away early leaves nothing behind.
+    """
+
+    def __init__(self, cache: "FileCache", key: Optional[str], url: str):
+        self._cache = cache
+        self._key = key
+        self._stack = ExitStack()
+        try:
+            self._response = self._stack.enter_context(http_client.stream("GET", url))
+            self._response.raise_for_status()
+        except BaseException:
+            self.close()
+            raise
+        length = self._response.headers.get("Content-Length")
+        self.size = int(length) if length and length.isdigit() else None
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._key is None:
+            try:
+                yield from self._response.iter_bytes(CHUNK_SIZE)
+            finally:
+                self.close()
+            return
+
+        path = self._cache._path(self._key)
+        tmp_path = f"{path}.part"
+        digest = hashlib.sha256()
+        size = 0
+        complete = False
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in self._response.iter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                    yield chunk
+            complete = True
+            last_modified = self._response.headers.get("Last-Modified")
+            os.replace(tmp_path, path)
+            with open(f"{path}.json", "w") as f:
+                json.dump({
+                    "etag": f'"{digest.hexdigest()[:32]}"',
+                    "last_modified": last_modified or time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()),
+                    "size": size,
+                }, f)
+        finally:
+            if not complete:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+            self.close()
+        self._cache._evict(keep=path)
+
+    def read(self) -> bytes:
+        return b"".join(self)
+
+    def close(self):
+        self._stack.close()
+        if self._key is not None:
+            self._cache._fill_done(self._key)
+            self._key = None
+
+    def __del__(self):
+        # A response that was never sent must not keep its URL marked as filling
+        self.close()
+
+
+class FileCache:
+    """Size-bounded local copy of remote files, evicted least recently used first.
+
+    Each entry is <sha256(url)> plus a <sha256(url)>.json sidecar holding the
+    content ETag, upstream Last-Modified and size. Cached files are opened under
+    the eviction lock, so a reader always gets a handle, never a path that may
+    already be gone. Misses stream from upstream while the first of them fills
+    the cache; concurrent misses for the same URL stream without writing.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Keys with a fill in progress; an entry is dropped as soon as its fill ends
+        self._filling = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _fill_done(self, key: str):
+        with self._lock:
+            self._filling.discard(key)
+
+    def open(self, url: str) -> Tuple[Union[BinaryIO, UpstreamFile], Optional[dict]]:
+        # Returns (open file, meta) for a cached entry, or (UpstreamFile, None) on a miss.
+        # The caller closes either one.
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        path = self._path(key)
+
+        with self._lock:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                f = None
+            if f is not None:
+                try:
+                    with open(f"{path}.json") as meta_file:
+                        meta = json.load(meta_file)
+                except (OSError, ValueError):
+                    f.close()
+                    f = None
+            if f is not None:
+                os.utime(path)
+                self.hits += 1
+                return f, meta
+
+            self.misses += 1
+            fill = key not in self._filling
+            if fill:
+                self._filling.add(key)
+
+        if not fill:
+            return UpstreamFile(self, None, url), None
+        try:
+            return UpstreamFile(self, key, url), None
+        except BaseException:
+            self._fill_done(key)
+            raise
+
+    def _evict(self, keep: str):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith((".json", ".part")):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                # Open readers keep their handle; unlinking only frees the name
+                for victim in (path, f"{path}.json"):
+                    try:
+                        os.remove(victim)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "filling": len(self._filling),
+            "maxBytes": self.max_bytes,
+        }
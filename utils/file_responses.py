@@ -0,0 +1,116 @@
+import os
+import re
+import unicodedata
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+from typing import BinaryIO, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from utils.file_cache import CHUNK_SIZE, UpstreamFile
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _iter_file(f: BinaryIO, start: int, end: int):
+    # Owns the handle: closes it once the range is sent or the reader goes away
+    try:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    # Only single ranges are served; anything else falls back to the full body
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def _not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*"
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def content_disposition(filename: str, disposition: str = "inline") -> str:
+    # Header values must be latin-1 and single-line: send an ASCII fallback plus the
+    # exact name percent-encoded as UTF-8 (RFC 6266 / RFC 5987)
+    filename = re.sub(r"[\x00-\x1f\x7f]", "", filename)
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    stem, dot, ext = re.sub(r'["\\]', "", fallback).strip().rpartition(".")
+    if not dot:
+        stem, ext = ext, ""
+    fallback = f"{' '.join(stem.split()) or 'download'}{dot}{ext}"
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def file_response(request: Request, f: BinaryIO, meta: dict, media_type: str, filename: str) -> Response:
+    # Takes ownership of f, an open cached file
+    size = os.fstat(f.fileno()).st_size
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": meta["etag"],
+        "Last-Modified": meta["last_modified"],
+        "Content-Disposition": content_disposition(filename),
+    }
+
+    if _not_modified(request, meta["etag"], meta["last_modified"]):
+        f.close()
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() in (meta["etag"], meta["last_modified"])):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            f.close()
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return StreamingResponse(
+            _iter_file(f, 0, size - 1), media_type=media_type,
+            headers={**headers, "Content-Length": str(size)},
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        _iter_file(f, start, end), status_code=206, media_type=media_type,
+        headers={**headers, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{size}"},
+    )
+
+
+def upstream_response(upstream: UpstreamFile, media_type: str, filename: str) -> Response:
+    # A cache miss: the whole body, passed through as it arrives. Ranges and validators
+    # are served once the file is cached, since its ETag is the hash of the full body.
+    headers = {"Content-Disposition": content_disposition(filename)}
+    if upstream.size is not None:
+        headers["Content-Length"] = str(upstream.size)
+    return StreamingResponse(iter(upstream), media_type=media_type, headers=headers)
@@ -0,0 +1,254 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import httpx
+
+# One pooled client per process for every outbound call (storage fetches and
+# uploads), with keep-alive, per-host limits, timeouts and retries
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS") or 100)
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE") or 20)
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST") or 20)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT") or 10)
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT") or 60)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES") or 3)
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF") or 0.5)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Only these are retried after the request may have reached the server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+LATENCY_BUCKETS = (0.1, 0.5, 1, 5, 30)
+
+
+class HttpMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = {}
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def started(self, host: str):
+        with self._lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+
+    def finished(self, host: str, elapsed: float, error: bool):
+        with self._lock:
+            self.in_flight[host] -= 1
+            self.requests += 1
+            self.errors += int(error)
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    self.latency_buckets[i] += 1
+                    break
+            else:
+                self.latency_buckets[-1] += 1
+
+    def retried(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {f"le_{bound}s": count for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets)}
+            buckets["gt_30s"] = self.latency_buckets[-1]
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "inFlight": sum(self.in_flight.values()),
+                "inFlightByHost": {host: n for host, n in self.in_flight.items() if n},
+                "latencyAvgSeconds": round(self.latency_total / self.requests, 4) if self.requests else 0.0,
+                "latencyMaxSeconds": round(self.latency_max, 4),
+                "latencyBuckets": buckets,
+            }
+
+
+metrics = HttpMetrics()
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+_host_semaphores = {}
+_async_host_semaphores = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE)
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def get_client() -> httpx.Client:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(limits=_limits(), timeout=_timeout(), follow_redirects=True)
+        return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout(), follow_redirects=True)
+    return _async_client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def _host(url: str) -> str:
+    return urlsplit(str(url)).netloc
+
+
+def _host_semaphore(host: str) -> threading.BoundedSemaphore:
+    with _client_lock:
+        return _host_semaphores.setdefault(host, threading.BoundedSemaphore(HTTP_MAX_CONNECTIONS_PER_HOST))
+
+
+def _async_host_semaphore(host: str) -> asyncio.Semaphore:
+    return _async_host_semaphores.setdefault(host, asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST))
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter keeps retries from many workers from arriving in lockstep
+    return random.uniform(0, HTTP_RETRY_BACKOFF * (2 ** attempt))
+
+
+def _should_retry(method: str, attempt: int, retries: int, response=None, error=None) -> bool:
+    if attempt >= retries:
+        return False
+    if isinstance(error, httpx.ConnectError) or isinstance(error, httpx.ConnectTimeout):
+        # Nothing reached the server, so any method is safe to resend
+        return True
+    if method.upper() not in IDEMPOTENT_METHODS:
+        return False
+    if error is not None:
+        return isinstance(error, httpx.TransportError)
+    return response.status_code in RETRY_STATUSES
+
+
+def request(method: str, url: str, retries: int = HTTP_MAX_RETRIES, **kwargs) -> httpx.Response:
+    client = get_client()
+    host = _host(url)
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        metrics.started(host)
+        response, error = None, None
+        try:
+            with _host_semaphore(host):
+                response = client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            error = e
+        finally:
+            failed = error is not None or (response is not None and response.status_code >= 500)
+            metrics.finished(host, time.perf_counter() - started, failed)
+
+        if not _should_retry(method, attempt, retries, response, error):
+            if error is not None:
+                raise error
+            return response
+        if response is not None:
+            response.close()
+        metrics.retried()
+        time.sleep(_backoff(attempt))
+        attempt += 1
+
+
+async def arequest(method: str, url: str, retries: int = HTTP_MAX_RETRIES, **kwargs) -> httpx.Response:
+    client = get_async_client()
+    host = _host(url)
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        metrics.started(host)
+        response, error = None, None
+        try:
+            async with _async_host_semaphore(host):
+                response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            error = e
+        finally:
+            failed = error is not None or (response is not None and response.status_code >= 500)
+            metrics.finished(host, time.perf_counter() - started, failed)
+
+        if not _should_retry(method, attempt, retries, response, error):
+            if error is not None:
+                raise error
+            return response
+        if response is not None:
+            await response.aclose()
+        metrics.retried()
+        await asyncio.sleep(_backoff(attempt))
+        attempt += 1
+
+
+@contextmanager
+def stream(method: str, url: str, retries: int = HTTP_MAX_RETRIES, **kwargs):
+    # Retries cover getting the response headers; the body is read by the caller
+    client = get_client()
+    host = _host(url)
+    attempt = 0
+    with _host_semaphore(host):
+        while True:
+            started = time.perf_counter()
+            metrics.started(host)
+            response, error = None, None
+            try:
+                response = client.send(client.build_request(method, url, **kwargs), stream=True)
+            except httpx.TransportError as e:
+                error = e
+
+            if _should_retry(method, attempt, retries, response, error):
+                metrics.finished(host, time.perf_counter() - started, True)
+                if response is not None:
+                    response.close()
+                metrics.retried()
+                time.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+
+            if error is not None:
+                metrics.finished(host, time.perf_counter() - started, True)
+                raise error
+            try:
+                yield response
+            finally:
+                response.close()
+                metrics.finished(host, time.perf_counter() - started, response.status_code >= 500)
+            return
+
+
+def pool_stats() -> dict:
+    stats = {"http": metrics.snapshot()}
+    # httpx does not expose pool state publicly; report it when the transport allows
+    for name, client in (("syncPool", _client), ("asyncPool", _async_client)):
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats[name] = {"connections": len(connections), "maxConnections": HTTP_MAX_CONNECTIONS}
+    return stats
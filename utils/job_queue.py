@@ -0,0 +1,128 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+from sqlalchemy import and_, or_, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database.models import Job
+
+QUEUED, RUNNING, DONE, FAILED = 0, 1, 2, 3
+
+EMBED_DOCUMENT = "embed_document"
+EXTRACT_METRICS = "extract_metrics"
+SUMMARIZE_CHAT = "summarize_chat"
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS") or 600)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS") or 5)
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS") or 30)
+
+
+def enqueue(db: Session, kind: str, document_id: str = None, delay_seconds: float = 0,
+            user_id: str = None) -> Optional[Job]:
+    # Returns None when the same job is already queued or running; the caller commits
+    dedupe_key = None
+    if document_id:
+        dedupe_key = f"{kind}:{document_id}:{user_id}" if user_id else f"{kind}:{document_id}"
+    job = Job(
+        kind=kind,
+        document_id=document_id,
+        user_id=user_id,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds),
+        dedupe_key=dedupe_key,
+    )
+    try:
+        with db.begin_nested():
+            db.add(job)
+    except IntegrityError:
+        return None
+    return job
+
+
+def claim(db: Session, worker_id: str, kinds: Sequence[str], limit: int = 1) -> List[Job]:
+    # Claims due jobs and jobs whose lease expired, then commits so other workers
+    # see them as taken. SKIP LOCKED keeps concurrent claimers off each other's rows;
+    # the guarded UPDATE covers databases that ignore FOR UPDATE.
+    now = datetime.utcnow()
+    # A worker that died on its last attempt leaves nothing to retry
+    db.query(Job).filter(
+        Job.status == RUNNING,
+        Job.lease_expires_at < now,
+        Job.attempts >= Job.max_attempts,
+    ).update({
+        "status": FAILED,
+        "locked_by": None,
+        "last_error": "Lease expired on the final attempt",
+    }, synchronize_session=False)
+
+    candidates = db.query(Job).filter(
+        Job.kind.in_(kinds),
+        or_(
+            and_(Job.status == QUEUED, Job.run_after <= now),
+            and_(Job.status == RUNNING, Job.lease_expires_at < now),
+        )
+    ).order_by(Job.run_after).limit(limit).with_for_update(skip_locked=True).all()
+
+    claimed = []
+    lease = now + timedelta(seconds=JOB_LEASE_SECONDS)
+    for job in candidates:
+        updated = db.query(Job).filter(
+            Job.id == job.id,
+            Job.status == job.status,
+            Job.attempts == job.attempts,
+        ).update({
+            "status": RUNNING,
+            "attempts": Job.attempts + 1,
+            "locked_by": worker_id,
+            "lease_expires_at": lease,
+        }, synchronize_session=False)
+        if updated:
+            claimed.append(job.id)
+    db.commit()
+
+    if not claimed:
+        return []
+    return db.query(Job).filter(Job.id.in_(claimed)).order_by(Job.run_after).all()
+
+
+def extend_lease(db: Session, worker_id: str, job_ids: Sequence[str]) -> int:
+    lease = datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+    updated = db.query(Job).filter(
+        Job.id.in_(job_ids),
+        Job.status == RUNNING,
+        Job.locked_by == worker_id,
+    ).update({"lease_expires_at": lease}, synchronize_session=False)
+    db.commit()
+    return updated
+
+
+def complete(db: Session, job: Job):
+    # Clearing dedupe_key lets the same work be enqueued again later
+    job.status = DONE
+    job.locked_by = None
+    job.lease_expires_at = None
+    job.last_error = None
+    job.dedupe_key = None
+
+
+def fail(db: Session, job: Job, error: str):
+    # Retries with exponential backoff; a job that runs out of attempts keeps its
+    # dedupe_key so periodic sweeps do not resurrect it
+    job.locked_by = None
+    job.lease_expires_at = None
+    job.last_error = error[:2000]
+    if job.attempts < job.max_attempts:
+        job.status = QUEUED
+        delay = JOB_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+        job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+    else:
+        job.status = FAILED
+
+
+def stats(db: Session) -> dict:
+    rows = db.query(Job.kind, Job.status, func.count(Job.id)).group_by(Job.kind, Job.status).all()
+    names = {QUEUED: "queued", RUNNING: "running", DONE: "done", FAILED: "failed"}
+    result = {}
+    for kind, status, count in rows:
+        result.setdefault(kind, {})[names.get(status, str(status))] = count
+    return result
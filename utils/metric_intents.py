@@ -0,0 +1,113 @@
+import re
+import threading
+from typing import Optional
+
+# Each metric column with the explicit phrases that ask for it, how to print it and
+# what to call it. Bare words like "loans", "members" or "income" are left to the LLM,
+# since most questions that use them are not asking for the stored figure.
+METRIC_INTENTS = {
+    "membership_count": (
+        r"\b(number|count|total) of (the )?(sacco )?members\b|\bhow many members\b|"
+        r"\bmembership (count|size|number|base)\b|\btotal membership\b|\bmember count\b",
+        "count", "number of members"),
+    "loan_book_value": (
+        r"\bloan ?book( value| size)?\b|\bloan portfolio\b|\b(value|size) of (the )?loans\b|"
+        r"\btotal loans( and advances)?\b|\bgross loans\b",
+        "amount", "loan book value"),
+    "asset_base": (r"\basset ?base\b|\btotal assets\b|\b(value|size) of (the )?assets\b", "amount", "asset base"),
+    "deposits": (
+        r"\btotal (member )?(deposits|savings)\b|\b(value|amount|size) of (the )?(member )?deposits\b|"
+        r"\bdeposit base\b|\bmember deposits\b",
+        "amount", "total deposits"),
+    "dividend_rate": (r"\bdividend (rate|paid|payout|declared)\b|\brate of dividends?\b", "percent", "dividend rate"),
+    "interest_rebate": (r"\binterest rebate\b|\brebate (rate|on deposits|paid)\b", "percent", "interest rebate"),
+    "revenue": (r"\b(total )?revenue\b|\btotal income\b|\bgross income\b|\bturnover\b", "amount", "revenue"),
+    "portfolio_at_risk": (
+        r"\bportfolio at risk\b|\bpar ratio\b|\bnon[- ]?performing loans? (ratio|rate)\b",
+        "percent", "portfolio at risk"),
+}
+
+# A match on the key makes the listed, looser matches redundant ("non-performing loans")
+SUPERSEDES = {
+    "portfolio_at_risk": {"loan_book_value"},
+    "interest_rebate": {"revenue"},
+}
+
+# Questions that need reasoning over the text rather than a single stored figure:
+# explanations, comparisons, procedures, people, products and rates charged on things
+NEEDS_CONTEXT = re.compile(
+    r"\b(why|how (do|does|did|can|to|is|are|was|were)|who|whom|whose|which|where|when|"
+    r"explain|compare|comparison|versus|vs|between|trend|change[ds]?|grow(th|n)?|"
+    r"increase[ds]?|decrease[ds]?|drop(ped)?|rise|rose|fell|impact|affect|reason|cause[ds]?|"
+    r"previous|last year|prior|breakdown|policy|summar\w*|analy\w*|should|could|would|"
+    r"net|products?|services?|offered|offer|types?|kinds?|requirements?|eligib\w*|become|join|"
+    r"apply|board|committee|par value|interest rate|rate (on|for|of interest)|charged?)\b"
+)
+
+MAX_QUESTION_WORDS = 20
+
+_patterns = {field: re.compile(pattern) for field, (pattern, _, _) in METRIC_INTENTS.items()}
+
+
+def classify_metric_question(query: str) -> Optional[str]:
+    # Returns the SaccoMetric column a question asks for, or None when it is not
+    # a plain single-metric lookup
+    text = " ".join(query.lower().split())
+    if not text or len(text.split()) > MAX_QUESTION_WORDS or NEEDS_CONTEXT.search(text):
+        return None
+
+    fields = {field for field, pattern in _patterns.items() if pattern.search(text)}
+    for field, redundant in SUPERSEDES.items():
+        if field in fields:
+            fields -= redundant
+    return fields.pop() if len(fields) == 1 else None
+
+
+def format_metric_value(field: str, value) -> str:
+    kind = METRIC_INTENTS[field][1]
+    if kind == "count":
+        return f"{int(value):,}"
+    if kind == "percent":
+        return f"{value:g}%"
+    text = f"{value:,.2f}"
+    return text[:-3] if text.endswith(".00") else text
+
+
+def format_metric_answer(field: str, value, document_name: str, year: int) -> Optional[str]:
+    # Extraction stores 0 for figures it could not find, so zero is not an answer
+    if not value:
+        return None
+    label = METRIC_INTENTS[field][2]
+    formatted = format_metric_value(field, value)
+    return f"According to the figures extracted from {document_name} ({year}), the {label} is {formatted}."
+
+
+class FastPathStats:
+    def __init__(self):
+        self.questions = 0
+        self.matched = 0
+        self.answered = 0
+        self.by_metric = {}
+        self._lock = threading.Lock()
+
+    def record(self, field: Optional[str], answered: bool):
+        with self._lock:
+            self.questions += 1
+            if field:
+                self.matched += 1
+            if answered:
+                self.answered += 1
+                self.by_metric[field] = self.by_metric.get(field, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "questions": self.questions,
+                "matched": self.matched,
+                "answered": self.answered,
+                "fastPathRate": round(self.answered / self.questions, 4) if self.questions else 0.0,
+                "byMetric": dict(self.by_metric),
+            }
+
+
+fast_path_stats = FastPathStats()
@@ -0,0 +1,133 @@
+from typing import Iterable, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from database.models import SaccoMetric, SaccoMetricRollup
+from utils.upsert import insert_ignore
+
+METRIC_FIELDS = [
+    "membership_count",
+    "loan_book_value",
+    "asset_base",
+    "deposits",
+    "dividend_rate",
+    "interest_rebate",
+    "revenue",
+    "portfolio_at_risk",
+]
+
+# Rollup row holding the totals across every year
+ALL_YEARS = 0
+
+
+def _empty_values(year: int) -> dict:
+    values = {"year": year, "metric_count": 0}
+    for field in METRIC_FIELDS:
+        values[f"sum_{field}"] = 0
+        values[f"avg_{field}"] = 0
+        values[f"count_{field}"] = 0
+    return values
+
+
+def _empty_rollup(year: int) -> SaccoMetricRollup:
+    return SaccoMetricRollup(**_empty_values(year))
+
+
+def _set_average(rollup: SaccoMetricRollup, field: str):
+    # Like AVG(), NULL metrics count towards neither the sum nor the divisor
+    count = getattr(rollup, f"count_{field}")
+    setattr(rollup, f"avg_{field}", getattr(rollup, f"sum_{field}") / count if count else 0)
+
+
+def _lock_rollup(db: Session, year: int) -> SaccoMetricRollup:
+    # Create the row first, then lock it. A locking read of a missing row takes a gap
+    # lock on MySQL, and two transactions creating the same year would then deadlock.
+    insert_ignore(db, SaccoMetricRollup, [_empty_values(year)], ["year"])
+    return db.query(SaccoMetricRollup).filter(
+        SaccoMetricRollup.year == year
+    ).with_for_update().populate_existing().one()
+
+
+def apply_metric(db: Session, metric: SaccoMetric):
+    # Fold a newly inserted metric row into its year's rollup and the all-years
+    # rollup; the caller commits both in one transaction. Rows are locked year
+    # first, then all years, the order every writer uses.
+    db.flush()  # Column defaults are only filled in on insert
+    for year in (metric.year, ALL_YEARS):
+        rollup = _lock_rollup(db, year)
+        rollup.metric_count += 1
+        for field in METRIC_FIELDS:
+            value = getattr(metric, field)
+            if value is not None:
+                setattr(rollup, f"sum_{field}", getattr(rollup, f"sum_{field}") + value)
+                setattr(rollup, f"count_{field}", getattr(rollup, f"count_{field}") + 1)
+            _set_average(rollup, field)
+
+
+def _recompute(year: Optional[int] = None) -> dict:
+    # Column -> scalar subquery over sacco_metrics, for one year or the whole table.
+    # Run inside an UPDATE, the subqueries see the latest committed metrics rather
+    # than the transaction's snapshot.
+    def scalar(expression):
+        query = select(expression)
+        if year is not None:
+            query = query.where(SaccoMetric.year == year)
+        return query.scalar_subquery()
+
+    values = {"metric_count": scalar(func.count(SaccoMetric.id))}
+    for field in METRIC_FIELDS:
+        column = getattr(SaccoMetric, field)
+        values[f"sum_{field}"] = scalar(func.coalesce(func.sum(column), 0))
+        values[f"count_{field}"] = scalar(func.count(column))
+    return values
+
+
+def _totals(rollup: SaccoMetricRollup) -> dict:
+    columns = ["metric_count"] + [f"{kind}_{field}" for field in METRIC_FIELDS for kind in ("sum", "count")]
+    return {column: getattr(rollup, column) for column in columns}
+
+
+def _rebuild_row(db: Session, rollup: SaccoMetricRollup, recompute_year: Optional[int]) -> SaccoMetricRollup:
+    # The caller holds the row lock
+    db.query(SaccoMetricRollup).filter(SaccoMetricRollup.year == rollup.year).update(
+        _recompute(recompute_year), synchronize_session=False
+    )
+    db.refresh(rollup)
+    for field in METRIC_FIELDS:
+        _set_average(rollup, field)
+    return rollup
+
+
+def rebuild_rollups(db: Session, years: Optional[Iterable[int]] = None):
+    # Recompute rollups from sacco_metrics, for the given years or all of them.
+    # Rows are updated in place under the same locks, taken in the same order
+    # (years ascending, then all years), as apply_metric, so concurrent inserts
+    # queue behind a rebuild instead of being overwritten by it.
+    full = years is None
+    if full:
+        years = {row.year for row in db.query(SaccoMetric.year).distinct()}
+        years |= {row.year for row in db.query(SaccoMetricRollup.year)}
+    years = sorted(set(years) - {ALL_YEARS})
+
+    delta = dict.fromkeys(_totals(_empty_rollup(ALL_YEARS)), 0)
+    for year in years:
+        rollup = _lock_rollup(db, year)
+        before = _totals(rollup)
+        _rebuild_row(db, rollup, year)
+        for column, value in _totals(rollup).items():
+            delta[column] += value - before[column]
+        if not rollup.metric_count:
+            db.delete(rollup)
+
+    if full:
+        # Rescan everything, so drift in the all-years row is corrected as well
+        everything = _rebuild_row(db, _lock_rollup(db, ALL_YEARS), None)
+    else:
+        # Other years are untouched, so the all-years row moves by exactly this much
+        everything = _lock_rollup(db, ALL_YEARS)
+        for column, change in delta.items():
+            setattr(everything, column, getattr(everything, column) + change)
+        for field in METRIC_FIELDS:
+            _set_average(everything, field)
+    if not everything.metric_count:
+        db.delete(everything)
+    db.flush()
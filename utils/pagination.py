@@ -0,0 +1,37 @@
+import json
+import base64
+from datetime import datetime
+from typing import Sequence
+from fastapi import HTTPException
+
+# Keyset cursors are the sort-key values of the last row on a page, as
+# url-safe base64 JSON; datetimes are tagged so they round-trip
+
+
+def encode_cursor(*values) -> str:
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_value(value, expected: type):
+    if expected is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get("dt"), str):
+            raise TypeError("expected a datetime")
+        return datetime.fromisoformat(value["dt"])
+    # bool is an int to isinstance, but never a valid sort key here
+    if not isinstance(value, expected) or isinstance(value, bool):
+        raise TypeError(f"expected {expected.__name__}")
+    return value
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> list:
+    # types are the sort-key types in order, e.g. (datetime, str); a cursor that was
+    # not produced for this listing is rejected before it reaches a query
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("wrong cursor size")
+        return [_decode_value(value, expected) for value, expected in zip(payload, types)]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,9 +1,194 @@
-import requests
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import multiprocessing
 import pdfplumber
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+from utils import http_client
+
+# Pages are extracted in ranges across a shared process pool
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS") or os.cpu_count() or 2)
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK") or 16)
+PDF_PAGE_CACHE_DIR = os.getenv("PDF_PAGE_CACHE_DIR") or ".cache/pages"
+PDF_PAGE_CACHE_MAX_MB = int(os.getenv("PDF_PAGE_CACHE_MAX_MB") or 256)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the API and ingestion processes are multi-threaded, which fork does not tolerate
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, PDF_EXTRACT_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+class PageCache:
+    # Extracted page text on disk, as <dir>/<sha256 of the file>/<page number>.txt.
+    # Bounded like the document file cache: once a new document pushes it past
+    # max_bytes, whole documents are evicted least recently used first.
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Documents being extracted or read in this process are never evicted
+        self._active = {}
+
+    def _dir(self, digest: str) -> str:
+        return os.path.join(self.directory, digest)
+
+    def acquire(self, digest: str):
+        with self._lock:
+            self._active[digest] = self._active.get(digest, 0) + 1
+
+    def release(self, digest: str):
+        with self._lock:
+            self._active[digest] -= 1
+            if not self._active[digest]:
+                del self._active[digest]
+
+    def page_count(self, digest: str) -> Optional[int]:
+        try:
+            with open(os.path.join(self._dir(digest), "meta.json")) as f:
+                pages = json.load(f)["pages"]
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(self._dir(digest))
+        except OSError:
+            pass
+        return pages
+
+    def set_page_count(self, digest: str, pages: int):
+        os.makedirs(self._dir(digest), exist_ok=True)
+        with open(os.path.join(self._dir(digest), "meta.json"), "w") as f:
+            json.dump({"pages": pages}, f)
+
+    def has(self, digest: str, page_number: int) -> bool:
+        return os.path.exists(os.path.join(self._dir(digest), f"{page_number}.txt"))
+
+    def get(self, digest: str, page_number: int) -> str:
+        with open(os.path.join(self._dir(digest), f"{page_number}.txt"), encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, digest: str, page_number: int, text: str):
+        path = os.path.join(self._dir(digest), f"{page_number}.txt")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            entries = []
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                return
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+                    entries.append((os.stat(path).st_mtime, size, name))
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if name in self._active:
+                    continue
+                # Another process reading this document fails its job, which is retried
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+                total -= size
+                self.evictions += 1
+
+
+page_cache = PageCache(PDF_PAGE_CACHE_DIR, max_bytes=PDF_PAGE_CACHE_MAX_MB * 1024 * 1024)
+
+
+def extract_page_range(path: str, first_page: int, last_page: int) -> List[Tuple[int, str]]:
+    # Runs in the process pool; page numbers are 1-based and inclusive
+    results = []
+    with pdfplumber.open(path, pages=list(range(first_page, last_page + 1))) as pdf:
+        for page in pdf.pages:
+            results.append((page.page_number, page.extract_text() or ""))
+            # Drop the parsed layout objects before moving to the next page
+            page.close()
+    return results
+
+
+def _page_ranges(pages: List[int], size: int) -> List[Tuple[int, int]]:
+    ranges = []
+    for page_number in pages:
+        if ranges and page_number == ranges[-1][1] + 1 and page_number - ranges[-1][0] < size:
+            ranges[-1] = (ranges[-1][0], page_number)
+        else:
+            ranges.append((page_number, page_number))
+    return ranges
+
+
+def extract_pages(pdf_bytes: bytes, use_cache: bool = True) -> Iterator[Tuple[int, str]]:
+    # Yields (page_number, text) in page order, extracting uncached pages in parallel
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    if use_cache:
+        page_cache.acquire(digest)
+        try:
+            yield from _extract_pages(page_cache, digest, pdf_bytes)
+        finally:
+            page_cache.release(digest)
+        return
+    # Pages still pass through disk, in a directory removed once the generator is done or closed
+    with tempfile.TemporaryDirectory(prefix="pages-") as directory:
+        yield from _extract_pages(PageCache(directory), digest, pdf_bytes)
+
+
+def _extract_pages(cache: PageCache, digest: str, pdf_bytes: bytes) -> Iterator[Tuple[int, str]]:
+    page_count = cache.page_count(digest)
+    if page_count is None:
+        with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+            page_count = len(pdf.pages)
+        cache.set_page_count(digest, page_count)
+
+    missing = [n for n in range(1, page_count + 1) if not cache.has(digest, n)]
+    if missing:
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf_bytes)
+            pool = get_extract_pool()
+            futures = [
+                pool.submit(extract_page_range, path, first, last)
+                for first, last in _page_ranges(missing, PDF_PAGES_PER_TASK)
+            ]
+            for future in as_completed(futures):
+                for page_number, text in future.result():
+                    cache.put(digest, page_number, text)
+        finally:
+            os.remove(path)
+        cache.evict()
+
+    # Read back one page at a time so callers never hold the whole document
+    for page_number in range(1, page_count + 1):
+        yield page_number, cache.get(digest, page_number)
+
 
 def extract_text_from_pdf_url(url: str) -> str:
-    response = requests.get(url)
+    response = http_client.request("GET", url)
     response.raise_for_status()
-    with pdfplumber.open(BytesIO(response.content)) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return "\n".join(text for _, text in extract_pages(response.content))
@@ -0,0 +1,121 @@
+import threading
+from urllib.parse import urlencode
+from typing import Any, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.cache import TTLCache
+
+
+class CacheBackend:
+    # Storage for cached responses; implement these three to plug in another store
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class InMemoryBackend(CacheBackend):
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def clear(self):
+        self._cache.clear()
+
+
+BACKENDS = {"memory": InMemoryBackend}
+
+
+def register_backend(name: str, backend_cls):
+    BACKENDS[name] = backend_cls
+
+
+def create_backend(name: str, **options) -> CacheBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown cache backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+
+class ResponseCache:
+    """Caches endpoint responses and drops them all when a watched model changes.
+
+    Changes are picked up from ORM flushes and bulk statements on any Session
+    in this process, and applied once the transaction commits.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend, watched_models: Iterable[type]):
+        self.name = name
+        self.backend = backend
+        self.watched_models = tuple(watched_models)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._flag = f"{name}_cache_dirty"
+
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "do_orm_execute", self._on_execute)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_soft_rollback", self._after_rollback)
+
+    @staticmethod
+    def key(endpoint: str, **params) -> str:
+        query = urlencode(sorted((k, v) for k, v in params.items() if v is not None))
+        return f"{endpoint}?{query}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        self.backend.set(key, value)
+
+    def invalidate(self):
+        self.backend.clear()
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    def _after_flush(self, session, flush_context):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, self.watched_models):
+                session.info[self._flag] = True
+                return
+
+    def _on_execute(self, orm_execute_state):
+        if orm_execute_state.is_select:
+            return
+        mappers = orm_execute_state.all_mappers
+        if any(mapper.class_ in self.watched_models for mapper in mappers):
+            orm_execute_state.session.info[self._flag] = True
+
+    def _after_commit(self, session):
+        if session.info.pop(self._flag, False):
+            self.invalidate()
+
+    def _after_rollback(self, session, previous_transaction):
+        if not session.in_transaction():
+            session.info.pop(self._flag, None)
@@ -0,0 +1,10 @@
+from functools import lru_cache
+from tiktoken import get_encoding
+
+@lru_cache(maxsize=None)
+def get_encoder(name: str = "cl100k_base"):
+    # Loading an encoding parses its BPE ranks, so share one instance per process
+    return get_encoding(name)
+
+def count_tokens(text: str, name: str = "cl100k_base") -> int:
+    return len(get_encoder(name).encode(text))
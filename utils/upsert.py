@@ -0,0 +1,49 @@
+from typing import List, Sequence
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert(db: Session, model, rows: List[dict], conflict_columns: Sequence[str], update_columns: Sequence[str]):
+    # One INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE for the dialect in use,
+    # executed for all rows at once. Deduplicate rows on the conflict key first:
+    # PostgreSQL refuses to update the same row twice in one statement.
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    touched = {"updated_at": func.now()} if hasattr(model, "updated_at") else {}
+
+    if dialect == "mysql":
+        stmt = mysql.insert(model)
+        stmt = stmt.on_duplicate_key_update(
+            **{column: stmt.inserted[column] for column in update_columns}, **touched
+        )
+    elif dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(conflict_columns),
+            set_={**{column: stmt.excluded[column] for column in update_columns}, **touched},
+        )
+    else:
+        raise NotImplementedError(f"Upsert is not supported on {dialect}")
+
+    db.execute(stmt, rows)
+
+
+def insert_ignore(db: Session, model, rows: List[dict], conflict_columns: Sequence[str]):
+    # Inserts rows whose key is not taken yet and leaves existing ones untouched.
+    # MySQL has no DO NOTHING; a no-op ON DUPLICATE KEY UPDATE stands in for it.
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        stmt = mysql.insert(model)
+        stmt = stmt.on_duplicate_key_update(**{column: stmt.table.c[column] for column in conflict_columns})
+    elif dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(model)
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+    else:
+        raise NotImplementedError(f"Insert-ignore is not supported on {dialect}")
+
+    db.execute(stmt, rows)
@@ -0,0 +1,255 @@
+import os
+import json
+import shutil
+import threading
+import numpy as np
+from chromadb import PersistentClient
+from typing import List, Optional, Sequence
+from utils.cache import TTLCache
+from utils.embeddings import EMBEDDING_COLLECTION
+
+VECTOR_STORE = os.getenv("VECTOR_STORE") or "chroma"
+CHROMA_PATH = os.getenv("CHROMA_PATH") or ".chroma"
+NUMPY_VECTOR_DIR = os.getenv("NUMPY_VECTOR_DIR") or ".vectors"
+NUMPY_VECTOR_DTYPE = os.getenv("NUMPY_VECTOR_DTYPE") or "float32"
+NUMPY_VECTOR_CACHE_SIZE = int(os.getenv("NUMPY_VECTOR_CACHE_SIZE") or 256)
+# none: one collection; document or year: one collection per document or per year.
+# Changing this needs a re-ingest, since existing vectors stay where they were written.
+VECTOR_PARTITION = os.getenv("VECTOR_PARTITION") or "none"
+VECTOR_COLLECTION_CACHE_SIZE = int(os.getenv("VECTOR_COLLECTION_CACHE_SIZE") or 512)
+
+
+class VectorStore:
+    # Chunk vectors scoped by document; every retrieval in the app is per document.
+    # `year` is the document's year, used by stores partitioned by year.
+
+    def add(self, document_id: str, texts: Sequence[str], embeddings: Sequence[Sequence[float]],
+            metadatas: Optional[Sequence[dict]] = None, year: Optional[int] = None):
+        raise NotImplementedError
+
+    def query(self, document_id: str, embedding: Sequence[float], top_k: int = 5,
+              year: Optional[int] = None) -> List[str]:
+        raise NotImplementedError
+
+    def delete_document(self, document_id: str, year: Optional[int] = None):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class ChromaVectorStore(VectorStore):
+    """Chroma-backed store; open one per process (see get_vector_store).
+
+    Collection handles are kept warm behind an LRU so the hot path skips
+    Chroma's metadata lookup, and writes go through a single lock.
+    """
+
+    def __init__(self, path: str = CHROMA_PATH, collection: str = EMBEDDING_COLLECTION,
+                 partition: str = VECTOR_PARTITION, cache_size: int = VECTOR_COLLECTION_CACHE_SIZE):
+        if partition not in ("none", "document", "year"):
+            raise ValueError(f"Unknown vector partition '{partition}'. Available: none, document, year")
+        self.client = PersistentClient(path=path)
+        self.collection_name = collection
+        self.partition = partition
+        self._collections = TTLCache(maxsize=cache_size)
+        self._write_lock = threading.Lock()
+
+    def _name(self, document_id, year):
+        if self.partition == "document":
+            return f"{self.collection_name}-doc-{document_id}"
+        if self.partition == "year":
+            if year is None:
+                raise ValueError("The year is required when vectors are partitioned by year")
+            return f"{self.collection_name}-year-{year}"
+        return self.collection_name
+
+    def _collection(self, document_id, year, create=True):
+        name = self._name(document_id, year)
+        collection = self._collections.get(name)
+        if collection is None:
+            if create:
+                collection = self.client.get_or_create_collection(name=name)
+            else:
+                try:
+                    collection = self.client.get_collection(name=name)
+                except Exception:
+                    return None
+            self._collections.set(name, collection)
+        return collection
+
+    def add(self, document_id, texts, embeddings, metadatas=None, year=None):
+        metadatas = metadatas or [{} for _ in texts]
+        with self._write_lock:
+            # Chroma skips ids it already holds, so clear the document first: a retried or
+            # re-ingested document then ends up with exactly the new chunks, as in NumpyVectorStore
+            self._delete(document_id, year)
+            collection = self._collection(document_id, year)
+            collection.add(
+                documents=list(texts),
+                embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+                ids=[f"{document_id}_{i}" for i in range(len(texts))],
+                metadatas=[{**m, "document_id": document_id} for m in metadatas],
+            )
+
+    def query(self, document_id, embedding, top_k=5, year=None):
+        # A per-document collection holds nothing else, so it needs no filter
+        where = None if self.partition == "document" else {"document_id": document_id}
+        # Reads never create partitions, so unknown documents leave nothing behind
+        collection = self._collection(document_id, year, create=False)
+        if collection is None:
+            return []
+        results = collection.query(
+            query_embeddings=[np.asarray(embedding, dtype=np.float32).tolist()],
+            n_results=top_k,
+            where=where
+        )
+        return results['documents'][0] if results and results['documents'] else []
+
+    def _delete(self, document_id, year):
+        # Callers hold the write lock
+        if self.partition == "document":
+            name = self._name(document_id, year)
+            self._collections.pop(name)
+            try:
+                self.client.delete_collection(name=name)
+            except Exception:
+                pass  # Never ingested
+        else:
+            collection = self._collection(document_id, year, create=False)
+            if collection is not None:
+                collection.delete(where={"document_id": document_id})
+
+    def delete_document(self, document_id, year=None):
+        with self._write_lock:
+            self._delete(document_id, year)
+
+    def stats(self) -> dict:
+        return {"backend": "chroma", "partition": self.partition, "collections": self._collections.stats()}
+
+
+class _DocumentIndex:
+    __slots__ = ("vectors", "texts")
+
+    def __init__(self, vectors, texts):
+        self.vectors = vectors
+        self.texts = texts
+
+
+class NumpyVectorStore(VectorStore):
+    """One memory-mapped matrix of unit-length vectors per document.
+
+    Layout is <directory>/<collection>/<document_id>/vectors.npy plus chunks.json
+    (texts and metadata, row-aligned). Matrices are opened lazily and kept behind
+    an LRU; a query is one matrix-vector product and an exact top-k.
+    """
+
+    def __init__(self, directory: str = NUMPY_VECTOR_DIR, collection: str = EMBEDDING_COLLECTION,
+                 dtype: str = NUMPY_VECTOR_DTYPE, cache_size: int = NUMPY_VECTOR_CACHE_SIZE):
+        self.directory = os.path.join(directory, collection)
+        self.dtype = np.dtype(dtype)
+        self._indexes = TTLCache(maxsize=cache_size)
+        self._write_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, document_id: str) -> str:
+        # Document ids are UUIDs; keep anything else from escaping the directory
+        return os.path.join(self.directory, os.path.basename(document_id))
+
+    def _load(self, document_id: str) -> Optional[_DocumentIndex]:
+        index = self._indexes.get(document_id)
+        if index is not None:
+            return index
+
+        path = self._path(document_id)
+        try:
+            vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+            with open(os.path.join(path, "chunks.json"), encoding="utf-8") as f:
+                texts = [chunk["text"] for chunk in json.load(f)]
+        except FileNotFoundError:
+            return None
+        if len(texts) != vectors.shape[0]:
+            # Caught between the two file replacements of a concurrent write
+            return None
+
+        index = _DocumentIndex(vectors, texts)
+        self._indexes.set(document_id, index)
+        return index
+
+    def add(self, document_id, texts, embeddings, metadatas=None, year=None):
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = (vectors / np.where(norms == 0, 1, norms)).astype(self.dtype)
+        chunks = [{"text": text, "metadata": metadata} for text, metadata in zip(texts, metadatas)]
+
+        path = self._path(document_id)
+        with self._write_lock:
+            # Chunks are written in one call per document, so the new matrix replaces the
+            # stored one; a retried or re-ingested document ends up with a single copy
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "chunks.json.tmp"), "w", encoding="utf-8") as f:
+                json.dump(chunks, f)
+            with open(os.path.join(path, "vectors.npy.tmp"), "wb") as f:
+                np.save(f, vectors)
+            os.replace(os.path.join(path, "chunks.json.tmp"), os.path.join(path, "chunks.json"))
+            os.replace(os.path.join(path, "vectors.npy.tmp"), os.path.join(path, "vectors.npy"))
+            self._indexes.pop(document_id)
+
+    def query(self, document_id, embedding, top_k=5, year=None):
+        index = self._load(document_id)
+        if index is None or not index.texts:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        vectors = index.vectors
+        if vectors.dtype != np.float32:
+            # NumPy has no fast float16 matmul; halving storage still pays off on disk and page cache
+            vectors = vectors.astype(np.float32)
+        scores = vectors @ query
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [index.texts[i] for i in top]
+
+    def delete_document(self, document_id, year=None):
+        with self._write_lock:
+            self._indexes.pop(document_id)
+            shutil.rmtree(self._path(document_id), ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {"backend": "numpy", "partition": "document", "indexes": self._indexes.stats()}
+
+
+STORES = {
+    "chroma": ChromaVectorStore,
+    "numpy": NumpyVectorStore,
+}
+
+
+def register_store(name: str, store_cls):
+    STORES[name] = store_cls
+
+
+def create_vector_store(name: str = VECTOR_STORE, **options) -> VectorStore:
+    if name not in STORES:
+        raise ValueError(f"Unknown vector store '{name}'. Available: {', '.join(STORES)}")
+    return STORES[name](**options)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    # One store per process: a single client on the on-disk data, shared by the
+    # API, the ingestion pipeline and metric extraction
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_vector_store()
+        return _store